@@ -15,6 +15,10 @@ from pulp_manager.app.repositories import PulpServerRepository, PulpServerRepoRe
 TaskRepository
 
 
+# Matches the pulp server hostname that a task name refers to
+HOSTNAME_REGEX = re.compile(r"\b[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b")
+
+
 class PulpManagerCollector:
     """Class that collects data from pulp manager database and exposes as prometheus metrics
     """
@@ -150,8 +154,7 @@ class PulpManagerCollector:
 
             for task in tasks:
 
-                hostname_pattern = r"\b[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b"
-                task_pulp_server = re.search(hostname_pattern, task.name)
+                task_pulp_server = HOSTNAME_REGEX.search(task.name)
 
                 if not task_pulp_server:
                     continue
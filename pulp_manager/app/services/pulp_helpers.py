@@ -2,6 +2,7 @@
 """
 import re
 import os
+from functools import lru_cache
 from pulp3_bindings.pulp3 import Pulp3Client
 from pulp3_bindings.pulp3.tasks import get_task,monitor_task
 from pulp_manager.app.config import CONFIG
@@ -24,6 +25,19 @@ def get_repo_type_from_href(pulp_href: str):
     raise PulpManagerValueError(f"repo type could not be determined from pulp_href {pulp_href}")
 
 
+@lru_cache(maxsize=128)
+def compile_regex(pattern: str):
+    """Returns the compiled regex for the given pattern. Compiled patterns are cached
+    so that callers filtering repos on the same regex repeatedly don't pay to parse it each time
+
+    :param pattern: regex pattern to compile
+    :type pattern: str
+    :return: re.Pattern
+    """
+
+    return re.compile(pattern)
+
+
 def get_pulp_server_repos(pulp_server: PulpServer, regex_include: str=None,
          regex_exclude: str=None, exclude_no_remote: bool=True):
     """Returns a list of PulpServerRepos that match the given regex requirements.
@@ -39,18 +53,19 @@ def get_pulp_server_repos(pulp_server: PulpServer, regex_include: str=None,
     :return: List[PulpServerRepo]
     """
 
+    include_pattern = compile_regex(regex_include) if regex_include else None
+    exclude_pattern = compile_regex(regex_exclude) if regex_exclude else None
+
     matching_repos = []
     for repo in pulp_server.repos:
         if exclude_no_remote and repo.remote_feed is None:
             continue
         #pylint: disable=no-else-continue
         repo_name = repo.repo.name
-        if regex_exclude and re.search(regex_exclude, repo_name):
+        if exclude_pattern and exclude_pattern.search(repo_name):
             continue
-        elif regex_include and not re.search(regex_include, repo_name):
+        elif include_pattern and not include_pattern.search(repo_name):
             continue
-        elif regex_include and re.search(regex_include, repo_name):
-            matching_repos.append(repo)
         else:
             matching_repos.append(repo)
 
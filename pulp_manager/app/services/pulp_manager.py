@@ -54,7 +54,9 @@ from pulp_manager.app.repositories import (
 )
 from pulp_manager.app.services.base import PulpServerService
 from pulp_manager.app.utils import log
-from .pulp_helpers import new_pulp_client, get_repo_type_from_href, delete_by_href
+from .pulp_helpers import (
+    new_pulp_client, get_repo_type_from_href, delete_by_href, compile_regex
+)
 
 
 SUPPORTED_REPO_TYPES = ["rpm", "deb", "file", "python", "container"]
@@ -926,15 +928,15 @@ class PulpManager(PulpServerService):
         """
 
         entities = {}
+        include_pattern = compile_regex(regex_include) if regex_include else None
+        exclude_pattern = compile_regex(regex_exclude) if regex_exclude else None
 
         for entity in pulp_objects:
             # pylint: disable=no-else-continue
-            if regex_exclude and re.search(regex_exclude, entity.name):
+            if exclude_pattern and exclude_pattern.search(entity.name):
                 continue
-            elif regex_include and not re.search(regex_include, entity.name):
+            elif include_pattern and not include_pattern.search(entity.name):
                 continue
-            elif regex_include and re.search(regex_include, entity.name):
-                entities[entity.name] = entity
             else:
                 entities[entity.name] = entity
 
@@ -2,7 +2,6 @@
 """
 import json
 import os
-import re
 import shutil
 import socket
 import tempfile
@@ -18,6 +17,7 @@ from pulp_manager.app.config import CONFIG
 from pulp_manager.app.repositories import TaskRepository
 from pulp_manager.app.services.base import PulpServerService
 from pulp_manager.app.services.pulp_manager import PulpManager
+from pulp_manager.app.services.pulp_helpers import compile_regex
 from pulp_manager.app.utils import log
 
 
@@ -168,6 +168,9 @@ class RepoConfigRegister(PulpServerService):
         :return: List
         """
 
+        include_pattern = compile_regex(regex_include) if regex_include else None
+        exclude_pattern = compile_regex(regex_exclude) if regex_exclude else None
+
         #pylint:disable=unused-variable
         parsed_repo_configs = []
         for root, directories, files in os.walk(repo_config_dir):
@@ -185,9 +188,9 @@ class RepoConfigRegister(PulpServerService):
                     elif "internal" in root and not name.startswith(CONFIG["pulp"]["internal_package_prefix"]):
                         name = f"{CONFIG['pulp']['internal_package_prefix']}{name}"
 
-                    if regex_exclude and re.search(regex_exclude, name):
+                    if exclude_pattern and exclude_pattern.search(name):
                         continue
-                    if regex_include and not re.search(regex_include, name):
+                    if include_pattern and not include_pattern.search(name):
                         continue
 
                     parsed_repo_configs.append(self._generate_repo_config_from_file(file_path))
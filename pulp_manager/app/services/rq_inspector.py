@@ -91,7 +91,8 @@ class RQInspector(PulpManagerService):
             "id": job.id,
             "args": job.args,
             "meta": job.meta,
-            "status": job.get_status(),
+            # job has just been loaded from redis, so no need to go back for the status
+            "status": job.get_status(refresh=False),
             "enqueued_at": job.enqueued_at,
             "started_at": job.started_at,
             "ended_at": job.ended_at,
@@ -176,31 +177,46 @@ class RQInspector(PulpManagerService):
 
         self._check_page_size(page_size)
 
-        queue = self.get_queue(name)
-        scheduler = Scheduler(queue=queue, connection=queue.connection)
-        # Schedule doesn't have a get_job_ids function and instead returns a
-        # generator. We could maybe subclass the Scheduler and provide
-        # our own version, but as we don't expect many jobs to be sitting
-        # to be scheduled on a cron just looping over what is stored
-        # and providing the list from the right indexes in the array is most
-        # lukely fine
-        scheduler_jobs = scheduler.get_jobs()
+        # Validates the queue exists
+        self.get_queue(name)
 
+        # Scheduler.get_jobs returns a generator which fetches each job individually
+        # from redis. Instead read the page of job ids from the scheduler's sorted set
+        # and pipeline the reads of the job hashes along with the total count.
+        # ZRANGE's stop index is inclusive
         start_page_num = (page - 1) * page_size
-        end_page_num = start_page_num + page_size
+        end_page_num = start_page_num + page_size - 1
 
-        jobs = []
-        count = 0
+        while True:
+            job_ids = self._redis.zrange(
+                Scheduler.scheduled_jobs_key, start_page_num, end_page_num
+            )
 
-        for job in scheduler_jobs:
-            #pylint: disable=chained-comparison
-            if count >= start_page_num and count < end_page_num:
-                jobs.append(self._format_job(job, False))
-            count += 1
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.zcard(Scheduler.scheduled_jobs_key)
+            for job_id in job_ids:
+                pipe.hgetall(Job.redis_job_namespace_prefix + job_id.decode())
+            total, *raw_jobs = pipe.execute()
+
+            # A job whose hash has expired can no longer be run, so it is removed from the
+            # scheduler in the same way Scheduler.get_jobs cancels it. The page is then read
+            # again so it isn't short and the total only counts jobs that still exist
+            expired_job_ids = [
+                job_id for job_id, raw_job in zip(job_ids, raw_jobs) if not raw_job
+            ]
+            if not expired_job_ids:
+                break
+            self._redis.zrem(Scheduler.scheduled_jobs_key, *expired_job_ids)
+
+        jobs = []
+        for job_id, raw_job in zip(job_ids, raw_jobs):
+            job = Job(job_id.decode(), connection=self._redis)
+            job.restore(raw_job)
+            jobs.append(self._format_job(job, False))
 
         return {
             "items": jobs,
             "page": page,
             "page_size": page_size,
-            "total": count
+            "total": total
         }
@@ -2,6 +2,7 @@
 """
 
 import os
+from collections import namedtuple
 from typing import List
 import yaml
 from cerberus import Validator
@@ -14,87 +15,100 @@ from pulp_manager.app.repositories import (
     PulpServerRepository, PulpServerRepoGroupRepository, RepoGroupRepository
 )
 
-
-def validate_schema(config: dict):
-    """Validates the given config dict checking for expected fields.
-    Schema error is raised if the config is not valid. Won't catch dodgy
-    cron syntaxes or max_runtime values, but gets enough of the config validated
-    """
-
-    schema = {
-        "pulp_servers": {
+# Use the libyaml backed loader when PyYAML has been built with it, as it is considerably
+# faster than the pure python loader
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+# Repo groups that exist in the db, with one lookup keyed by repo group name and
+# another keyed by repo group id
+ExistingRepoGroups = namedtuple("ExistingRepoGroups", "by_name by_id")
+
+PULP_CONFIG_SCHEMA = {
+    "pulp_servers": {
+        "type": "dict",
+        "keysrules": {"type": "string", "regex": "^[a-z0-9\\.\\-_]+(:[0-9]+)?$"},
+        "valuesrules": {
             "type": "dict",
-            "keysrules": {"type": "string", "regex": "^[a-z0-9\\.\\-_]+(:[0-9]+)?$"},
-            "valuesrules": {
-                "type": "dict",
-                "schema": {
-                    "credentials": {"type": "string", "required": True},
-                    "repo_config_registration": {
+            "schema": {
+                "credentials": {"type": "string", "required": True},
+                "repo_config_registration": {
+                    "type": "dict",
+                    "required": False,
+                    "keysrules": {"type": "string", "regex": "^[a-z][a-z0-9\\-_]+$"},
+                    "schema": {
+                        "schedule": {"type": "string", "required": True},
+                        "max_runtime": {"type": "string", "required": True},
+                        "regex_include": {"type": "string", "required": False},
+                        "regex_exclude": {"type": "string", "required": False}
+                    }
+                },
+                "repo_groups": {
+                    "type": "dict",
+                    "required": True,
+                    "keysrules": {"type": "string", "regex": "^[a-z][a-z0-9\\-_]+$"},
+                    "valuesrules": {
                         "type": "dict",
-                        "required": False,
-                        "keysrules": {"type": "string", "regex": "^[a-z][a-z0-9\\-_]+$"},
                         "schema": {
-                            "schedule": {"type": "string", "required": True},
+                            "schedule": {"type": "string", "required": False},
+                            "max_concurrent_syncs": {"type": "integer", "required": True},
                             "max_runtime": {"type": "string", "required": True},
-                            "regex_include": {"type": "string", "required": False},
-                            "regex_exclude": {"type": "string", "required": False}
-                        }
-                    },
-                    "repo_groups": {
-                        "type": "dict",
-                        "required": True,
-                        "keysrules": {"type": "string", "regex": "^[a-z][a-z0-9\\-_]+$"},
-                        "valuesrules": {
-                            "type": "dict",
-                            "schema": {
-                                "schedule": {"type": "string", "required": False},
-                                "max_concurrent_syncs": {"type": "integer", "required": True},
-                                "max_runtime": {"type": "string", "required": True},
-                                "pulp_master": {"type": "string", "required": False},
-                            }
-                        }
-                    },
-                    "snapshot_support": {
-                        "type": "dict",
-                        "required": False,
-                        "keysrules": {"type": "string", "regex": "^[a-z][a-z0-9\\-_]+$"},
-                        "schema": {
-                            "max_concurrent_snapshots": {"type": "integer", "required": True}
+                            "pulp_master": {"type": "string", "required": False},
                         }
                     }
+                },
+                "snapshot_support": {
+                    "type": "dict",
+                    "required": False,
+                    "keysrules": {"type": "string", "regex": "^[a-z][a-z0-9\\-_]+$"},
+                    "schema": {
+                        "max_concurrent_snapshots": {"type": "integer", "required": True}
+                    }
                 }
             }
-        },
-        "credentials": {
+        }
+    },
+    "credentials": {
+        "type": "dict",
+        "keysrules": {"type": "string", "regex": "^[a-z0-9]+[a-z\\-_]+$"},
+        "valuesrules": {
             "type": "dict",
-            "keysrules": {"type": "string", "regex": "^[a-z0-9]+[a-z\\-_]+$"},
-            "valuesrules": {
-                "type": "dict",
-                "schema": {
-                    "username": {"type": "string", "required": True},
-                    "vault_service_account_mount": {"type": "string", "required": True}
-                }
+            "schema": {
+                "username": {"type": "string", "required": True},
+                "vault_service_account_mount": {"type": "string", "required": True}
             }
-        },
-        "repo_groups": {
+        }
+    },
+    "repo_groups": {
+        "type": "dict",
+        "keysrules": {"type": "string", "regex": "^[a-z][a-z\\-_]+$"},
+        "valuesrules": {
             "type": "dict",
-            "keysrules": {"type": "string", "regex": "^[a-z][a-z\\-_]+$"},
-            "valuesrules": {
-                "type": "dict",
-                "schema": {
-                    "regex_include": {"type": "string", "required": False},
-                    "regex_exclude": {"type": "string", "required": False}
-                }
+            "schema": {
+                "regex_include": {"type": "string", "required": False},
+                "regex_exclude": {"type": "string", "required": False}
             }
         }
     }
+}
+
+# Checking the schema definition is done when the validator is created, so it is only
+# done once rather than each time a config is validated
+PULP_CONFIG_VALIDATOR = Validator(PULP_CONFIG_SCHEMA)
 
 
-    validator = Validator(schema)
-    if not validator.validate(config):
+def validate_schema(config: dict):
+    """Validates the given config dict checking for expected fields.
+    Schema error is raised if the config is not valid. Won't catch dodgy
+    cron syntaxes or max_runtime values, but gets enough of the config validated
+    """
+
+    if not PULP_CONFIG_VALIDATOR.validate(config):
         log.error("pulp config failed validation")
-        log.error(validator.errors)
-        raise PulpManagerPulpConfigError(validator.errors)
+        log.error(PULP_CONFIG_VALIDATOR.errors)
+        raise PulpManagerPulpConfigError(PULP_CONFIG_VALIDATOR.errors)
 
     config_errors = []
 
@@ -133,7 +147,7 @@ def load_pulp_config(config_path: str):
 
     #pylint: disable=unspecified-encoding
     with open(config_path, 'r') as config_file:
-        return yaml.safe_load(config_file.read())
+        return yaml.load(config_file.read(), Loader=SafeLoader)
 
 
 def parse_config_file(config_path: str):
@@ -167,18 +181,18 @@ class PulpConfigParser(PulpManagerDBService):
         self.pulp_server_repo_group_crud = PulpServerRepoGroupRepository(db)
 
     def _get_existing_repo_groups(self):
-        """Returns existing repo groups in a dict. Model is added with two
-        differnent keys, one being repo group name and the other being hte id
+        """Returns existing repo groups as an ExistingRepoGroups, which contains a dict
+        of the models keyed by repo group name and a dict keyed by repo group id
         """
 
         log.info("retrieving existing repo groups")
         repo_groups = self.repo_group_crud.filter()
-        repo_groups_dict = {}
+        existing_repo_groups = ExistingRepoGroups({}, {})
         for repo_group in repo_groups:
             log.debug(f"found repo group {repo_group.name} with id {repo_group.id}")
-            repo_groups_dict[repo_group.name] = repo_group
-            repo_groups_dict[repo_group.id] = repo_group
-        return repo_groups_dict
+            existing_repo_groups.by_name[repo_group.name] = repo_group
+            existing_repo_groups.by_id[repo_group.id] = repo_group
+        return existing_repo_groups
 
     def _calculate_repo_groups_to_add(self, existing_repo_groups: dict,
             configured_repo_groups: dict):
@@ -222,12 +236,8 @@ class PulpConfigParser(PulpManagerDBService):
         """
 
         repo_groups_to_remove = []
-        existing_repo_groups_names = [
-            name for name in existing_repo_groups.keys() if isinstance(name, str)
-        ]
-
         repo_group_names_to_remove = list(
-            set(existing_repo_groups_names) - set(configured_repo_groups.keys())
+            set(existing_repo_groups.keys()) - set(configured_repo_groups.keys())
         )
         log.info(f"repo groups to remove {','.join(repo_group_names_to_remove)}")
 
@@ -286,13 +296,13 @@ class PulpConfigParser(PulpManagerDBService):
         existing_repo_groups = self._get_existing_repo_groups()
 
         repo_groups_to_add = self._calculate_repo_groups_to_add(
-            existing_repo_groups, repo_group_configs
+            existing_repo_groups.by_name, repo_group_configs
         )
         repo_groups_to_update = self._calculate_repo_groups_to_update(
-            existing_repo_groups, repo_group_configs
+            existing_repo_groups.by_name, repo_group_configs
         )
         repo_groups_to_remove = self._calculate_repo_groups_to_remove(
-            existing_repo_groups, repo_group_configs
+            existing_repo_groups.by_name, repo_group_configs
         )
 
         if(len(repo_groups_to_add) > 0 or len(repo_groups_to_update) > 0 or
@@ -396,17 +406,17 @@ class PulpConfigParser(PulpManagerDBService):
             return pulp_servers_in_db
 
         try:
+            pulp_servers_to_add = []
             for pulp_server_name in missing_pulp_servers:
                 log.info(f"adding pulp server {pulp_server_name}")
 
                 pulp_server_config = config["pulp_servers"][pulp_server_name]
                 credentials_config = config["credentials"][pulp_server_config["credentials"]]
-                pulp_server_entity_config = self._get_pulp_server_entity_config(
+                pulp_servers_to_add.append(self._get_pulp_server_entity_config(
                     pulp_server_name, pulp_server_config, credentials_config
-                )
+                ))
 
-                self.pulp_server_crud.add(**pulp_server_entity_config)
-                self.db.flush()
+            self.pulp_server_crud.bulk_add(pulp_servers_to_add)
             self.db.commit()
         except Exception:
             log.exception("error adding pulp server")
@@ -475,14 +485,13 @@ class PulpConfigParser(PulpManagerDBService):
             raise
 
     def _calculate_pulp_server_repo_groups_to_add(self, pulp_server: PulpServer,
-            repo_groups: dict, config: dict, existing_pulp_servers: dict):
+            repo_groups: ExistingRepoGroups, config: dict, existing_pulp_servers: dict):
         """Calculates the repo groups that need to be added to a pulp server
         and returns a list of dicts with the options needed. 
         :param pulp_server: Existing pulp server entity in the DB
         :type pulp_server: PulpServer
-        :param repo_groups: Dict of repo groups that map to entities in the DB.
-                            Key is the repo group name
-        :type repo_groups: dict
+        :param repo_groups: Repo groups that map to entities in the DB
+        :type repo_groups: ExistingRepoGroups
         :param config: dict of config which can be used for bulk updates of PulpServerRepoGroup
         :type config: dict
         :param existing_pulp_servers: dict of pulp servers that exist in the db. Key is name
@@ -501,7 +510,7 @@ class PulpConfigParser(PulpManagerDBService):
         configured_repo_groups = config["pulp_servers"][pulp_server.name]["repo_groups"]
         for repo_group_name in configured_repo_groups:
             repo_group_config = configured_repo_groups[repo_group_name]
-            repo_group_id = repo_groups[repo_group_name].id
+            repo_group_id = repo_groups.by_name[repo_group_name].id
             pulp_master_id = None
             if "pulp_master" in repo_group_config:
                 pulp_master_id = existing_pulp_servers[repo_group_config["pulp_master"]].id
@@ -520,15 +529,14 @@ class PulpConfigParser(PulpManagerDBService):
 
 
     def _calculate_pulp_server_repo_groups_to_update(self, pulp_server: PulpServer,
-            repo_groups: dict, config: dict, existing_pulp_servers: dict):
+            repo_groups: ExistingRepoGroups, config: dict, existing_pulp_servers: dict):
         """Calculates the updates that are required to a PulpServerRepoGroup. Returns
         a list of dicts which contains the fileds that need to be updated for each
         repo group
         :param pulp_server: PulpServer entity in the database
         :type pulp_server: PulpServer
-        :param repo_groups: Dict of repo groups that map to entities in the DB.
-                            key can either be id or the name
-        :type repo_groups: dict
+        :param repo_groups: Repo groups that map to entities in the DB
+        :type repo_groups: ExistingRepoGroups
         :param config: dict of config which can be used for bulk updates of PulpServerRepoGroup
         :type config: dict
         :param existing_pulp_servers: dict of pulp servers that exist in the db. Key is name
@@ -543,10 +551,10 @@ class PulpConfigParser(PulpManagerDBService):
 
         for repo_group in pulp_server.repo_groups:
             # This is here for the fake repository as it doesn't handle cascade deletes
-            if repo_group.repo_group_id not in repo_groups:
+            if repo_group.repo_group_id not in repo_groups.by_id:
                 continue
 
-            repo_group_name = repo_groups[repo_group.repo_group_id].name
+            repo_group_name = repo_groups.by_id[repo_group.repo_group_id].name
             if repo_group_name not in configured_repo_groups:
                 continue
 
@@ -571,14 +579,13 @@ class PulpConfigParser(PulpManagerDBService):
         return repo_groups_to_update
 
     def _calculate_pulp_server_repo_groups_to_remove(self, pulp_server: PulpServer,
-            repo_groups: dict, config: dict):
+            repo_groups: ExistingRepoGroups, config: dict):
         """Calculates the repo groups that need t obe removed from a pulp server.
         Returns a list PulpServerRepoGroup models to be removed
         :param pulp_server: PulpServer database model to evaluate
         :type pulp_server: PulpServer
-        :param repo_groups: Dict of repo groups that map to entities in the DB.
-                            key can either be id or the name
-        :type repo_groups: dict
+        :param repo_groups: Repo groups that map to entities in the DB
+        :type repo_groups: ExistingRepoGroups
         :param config: dict of config which can be used for bulk updates of PulpServerRepoGroup
         :type config: dict
         :return: list
@@ -590,7 +597,7 @@ class PulpConfigParser(PulpManagerDBService):
         repo_group_expected_ids = []
 
         for repo_group_name in config["pulp_servers"][pulp_server.name]["repo_groups"]:
-            repo_group_expected_ids.append(repo_groups[repo_group_name].id)
+            repo_group_expected_ids.append(repo_groups.by_name[repo_group_name].id)
 
         for repo_group in pulp_server.repo_groups:
             if repo_group.repo_group_id not in repo_group_expected_ids:
@@ -600,7 +607,7 @@ class PulpConfigParser(PulpManagerDBService):
         return repo_groups_to_remove
 
     # pylint: disable=line-too-long
-    def _calculate_pulp_server_updates(self, pulp_servers: List, repo_groups: dict,
+    def _calculate_pulp_server_updates(self, pulp_servers: List, repo_groups: ExistingRepoGroups,
             config: dict, existing_pulp_servers: dict):
         """Calculates the updates that are needed to pulp server and their repo group config.
         Returns a list of dicts, where the dict has the following key values:
@@ -612,9 +619,9 @@ class PulpConfigParser(PulpManagerDBService):
         :param pulp_servers: list of pulp servers enties from the db that are still in the
                              loaded sync config
         :type pulp_servers: list
-        :param repo_groups: dict of repo_groups where the key can accesed via theid or name
-                            of the repo group, and the value is the group eneity from the database.
-        :type repo_groups: dict
+        :param repo_groups: repo groups that exist in the database, looked up by
+                            either the name or the id of the repo group
+        :type repo_groups: ExistingRepoGroups
         :param existing_pulp_servers: dict of pulp servers that exist in the db. Key is name of
                                       pulp server value is pulp server entity
         :return: list
@@ -692,22 +699,19 @@ class PulpConfigParser(PulpManagerDBService):
 
         return pulp_servers_to_remove
 
-    def _process_pulp_servers(self, config: dict, repo_groups: dict):
+    def _process_pulp_servers(self, config: dict, repo_groups: ExistingRepoGroups):
         """Adds/updates/removes any pulp servers and their associated repo groups based on the
         config dict passed through.
         :param config: Loaded config from yaml file which specifies pulp sync config
         :type config: dict
-        :param repo_groups: dict of RepoGroup entities that exist in the db. A repo group
+        :param repo_groups: RepoGroup entities that exist in the db. A repo group
                             can be obtained using either the name of the repo group or
                             its id
-        :type repo_groups: dict
+        :type repo_groups: ExistingRepoGroups
         """
 
         pulp_servers_in_db = self._add_pulp_servers(config)
-        pulp_servers = []
-        #pylint: disable=unused-variable
-        for pulp_server_name, pulp_server in pulp_servers_in_db.items():
-            pulp_servers.append(pulp_server)
+        pulp_servers = list(pulp_servers_in_db.values())
 
         pulp_servers_to_update = self._calculate_pulp_server_updates(
             pulp_servers, repo_groups, config, pulp_servers_in_db
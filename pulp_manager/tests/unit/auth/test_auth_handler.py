@@ -1,7 +1,7 @@
 """Tests for JWT signing and decoding
 """
 
-from mock import patch
+from unittest.mock import patch
 from pulp_manager.app.auth.auth_handler import sign_jwt, decode_jwt, authenticate
 
 
@@ -3,7 +3,7 @@
 import pytest
 import configparser
 import ldap
-from mock import patch
+from unittest.mock import patch
 
 from pulp_manager.app.auth.ldap_auth import get_connection_string, ldap_server_available, auth_user
 from pulp_manager.app.exceptions import PulpManagerLdapError
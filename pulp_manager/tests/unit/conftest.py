@@ -3,6 +3,7 @@
 import alembic
 import os
 import pathlib
+from contextlib import contextmanager
 import pytest
 import fakeredis
 from alembic.config import Config
@@ -10,9 +11,19 @@ from fastapi import FastAPI
 from fastapi.testclient import TestClient
 from rq import Queue
 from rq_scheduler import Scheduler
+from sqlalchemy import create_engine, text
 
+# When running under pytest-xdist each worker gets its own database, so that workers
+# applying and downgrading migrations don't interfere with each other. Needs to happen
+# before pulp_manager.app.database is imported as the engine is created from DB_NAME.
+# The db user requires permission to create the <DB_NAME>_gw<n> databases
+XDIST_WORKER = os.environ.get("PYTEST_XDIST_WORKER")
+if XDIST_WORKER and "DB_NAME" in os.environ:
+    os.environ["DB_NAME"] = f"{os.environ['DB_NAME']}_{XDIST_WORKER}"
+
+#pylint: disable=wrong-import-position
 from pulp3_bindings.pulp3 import Pulp3Client
-from pulp_manager.app.database import DB_URL
+from pulp_manager.app.database import DB_URL, engine, session
 from pulp_manager.tests.sample_data_setup import sample_data_insert
 
 
@@ -25,11 +36,55 @@ def fail_job():
     raise Exception("oh no!")
 
 
+def pytest_sessionfinish():
+    """Closes all pooled db connections once the whole test session has finished.
+    Tests only return connections to the pool, so it stays warm between tests
+    """
+
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def worker_database():
+    """Creates the database for the pytest-xdist worker and drops it again once the
+    worker has finished. Nothing to do when tests aren't being run in parallel
+    """
+
+    if not XDIST_WORKER:
+        yield
+        return
+
+    # DB_NAME is only rewritten for the worker if this module is imported before
+    # pulp_manager.app.database, otherwise every worker would share the same database
+    assert engine.url.database == os.environ["DB_NAME"], (
+        f"engine is bound to {engine.url.database}, expected worker database "
+        f"{os.environ['DB_NAME']}. pulp_manager.app.database was imported before conftest"
+    )
+
+    # Connect without a database, as the worker database may not exist yet
+    #pylint: disable=line-too-long
+    server_url = f"mysql+pymysql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOSTNAME')}"
+    server_engine = create_engine(server_url)
+    try:
+        with server_engine.connect() as connection:
+            connection.execute(text(f"CREATE DATABASE IF NOT EXISTS `{os.environ['DB_NAME']}`"))
+
+        yield
+
+        # Pooled connections to the worker database would block the drop
+        engine.dispose()
+        with server_engine.connect() as connection:
+            connection.execute(text(f"DROP DATABASE IF EXISTS `{os.environ['DB_NAME']}`"))
+    finally:
+        server_engine.dispose()
+
+
 # Apply migrations at beginning and end of testing session
 # if want to apply for each test then remove the scope parameter
 @pytest.fixture(scope="module", autouse=True)
-def apply_migrations():
-    """Applies database migrations
+def apply_migrations(worker_database: None):
+    """Applies database migrations. Runs for each module, so each xdist worker
+    reseeds the sample data into its own database
     """
 
     # if get the directory for the path of the file that was run
@@ -50,6 +105,52 @@ def apply_migrations():
     alembic.command.downgrade(config, "base")
 
 
+@contextmanager
+def transactional_session():
+    """Returns a session bound to a connection with an outer transaction that is rolled
+    back on exit. Commits made by the code under test only release a SAVEPOINT, so
+    nothing written persists and the connection goes straight back to the pool rather
+    than being closed
+    """
+
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = session(bind=connection, join_transaction_mode="create_savepoint")
+
+    try:
+        yield db
+    finally:
+        db.close()
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture
+def db_session(apply_migrations: None):
+    """Transactional session that is rolled back once the test completes
+    """
+
+    with transactional_session() as db:
+        yield db
+
+
+@pytest.fixture(scope="class")
+def class_connection(apply_migrations: None):
+    """Connection shared by all tests in a class, with an outer transaction that is rolled
+    back once the class completes. Tests can isolate their changes from each other with
+    a SAVEPOINT via begin_nested
+    """
+
+    connection = engine.connect()
+    transaction = connection.begin()
+
+    try:
+        yield connection
+    finally:
+        transaction.rollback()
+        connection.close()
+
+
 def get_fake_redis() -> fakeredis:
     """Populates a fake redis with some sample data so that it can be used
     as an override in the FastAPI Test app
@@ -5,7 +5,7 @@ import pytest
 import sqlalchemy
 from sqlalchemy.exc import InvalidRequestError
 
-from pulp_manager.app.database import session, engine
+from pulp_manager.app.database import session
 from pulp_manager.app.models import (
     PulpServer, PulpServerRepoGroup, PulpServerRepo, PulpServerRepoTask
 )
@@ -32,7 +32,6 @@ class TestPulpServerRepository:
         """
 
         self.db.close()
-        engine.dispose()
 
     def test_no_filter(self):
         """Tests that when no filtering is applied to the db all pulp_server objects are returned.
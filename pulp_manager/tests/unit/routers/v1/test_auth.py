@@ -1,7 +1,7 @@
 """Carries out tests for v1 pulp_servers routes
 """
 import fakeredis
-from mock import patch
+from unittest.mock import patch
 from fastapi.testclient import TestClient
 
 from pulp_manager.app.auth.auth_handler import sign_jwt, decode_jwt
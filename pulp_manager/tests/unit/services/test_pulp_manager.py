@@ -4,7 +4,7 @@ import os
 from datetime import datetime
 
 import pytest
-from mock import MagicMock, mock_open, patch
+from unittest.mock import MagicMock, mock_open, patch
 
 from pulp3_bindings.pulp3 import Pulp3Client
 from pulp3_bindings.pulp3.resources import (DebDistribution, DebRemote,
@@ -12,7 +12,7 @@ from pulp3_bindings.pulp3.resources import (DebDistribution, DebRemote,
                                             RpmRemote, RpmRepository,
                                             SigningService)
 from pulp3_bindings.pulp3.resources import Task as Pulp3Task
-from pulp_manager.app.database import engine, session
+from pulp_manager.app.database import session
 from pulp_manager.app.exceptions import PulpManagerError, PulpManagerValueError
 from pulp_manager.app.models import PulpServer
 from pulp_manager.app.repositories import (PulpServerRepoRepository,
@@ -73,7 +73,6 @@ class TestPulpManager:
 
         db.commit()
         db.close()
-        engine.dispose()
 
     @patch("pulp_manager.app.services.pulp_manager.new_pulp_client")
     @patch("pulp_manager.app.services.pulp_manager.PulpManager._get_deb_signing_service")
@@ -100,7 +99,6 @@ class TestPulpManager:
         """
 
         self.db.close()
-        engine.dispose()
 
     def test_get_root_ca_env(self):
         """Tests that when PULP_MANAGER_CA_FILE is set as an environment variable
@@ -2,12 +2,12 @@
 """
 
 import pytest
-from mock import patch
+from unittest.mock import patch
 
 from pulp3_bindings.pulp3 import Pulp3Client
 from pulp3_bindings.pulp3.resources import Repository, Remote, Distribution
 
-from pulp_manager.app.database import session, engine
+from pulp_manager.app.database import session
 from pulp_manager.app.services.reconciler import PulpReconciler, PulpRepoInstance
 from pulp_manager.app.models import PulpServer, Repo
 from pulp_manager.app.repositories import (
@@ -75,7 +75,6 @@ class TestPulpReconciler:
         cls.deb_repo2_id = deb_repo2.id
 
         db.close()
-        engine.dispose()
 
     def setup_method(self, method):
         """Ensure an instance of PulpReconciler is available for all tests along with
@@ -93,7 +92,6 @@ class TestPulpReconciler:
         """
 
         self.db.close()
-        engine.dispose()
 
     @patch("pulp_manager.app.services.reconciler.new_pulp_client")
     @patch("pulp_manager.app.services.reconciler.get_all_repos")
@@ -6,9 +6,9 @@ import os
 import shutil
 
 import pytest
-from mock import mock_open, patch
+from unittest.mock import mock_open, patch
 
-from pulp_manager.app.database import engine, session
+from pulp_manager.app.database import session
 from pulp_manager.app.services.repo_config_register import RepoConfigRegister
 
 
@@ -30,7 +30,6 @@ class TestRepoConfigRegister:
         """
 
         self.db.close()
-        engine.dispose()
 
     @patch("pulp_manager.app.services.repo_config_register.Repo.clone_from")
     def test_clone_pulp_repo_config(self, mock_clone_from):
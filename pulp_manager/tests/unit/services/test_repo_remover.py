@@ -2,56 +2,69 @@
 """
 
 import pytest
-from mock import patch, MagicMock
+from unittest.mock import patch, MagicMock
 from pulp3_bindings.pulp3 import Pulp3Client
 
-from pulp_manager.app.database import session, engine
-from pulp_manager.app.models import PulpServer
 from pulp_manager.app.services.repo_remover import RepoRemover
 from pulp_manager.app.exceptions import  PulpManagerValueError
 
 
+@pytest.fixture(autouse=True)
+def mock_new_pulp_client(monkeypatch):
+    """Patches new_pulp_client for the whole of each test rather than only during setup,
+    so no real client is ever created. spec keeps attribute access restricted to the
+    Pulp3Client interface
+    """
+
+    mock = MagicMock(side_effect=lambda pulp_server: MagicMock(spec=Pulp3Client))
+    monkeypatch.setattr("pulp_manager.app.services.repo_remover.new_pulp_client", mock)
+    return mock
+
+
 class TestRepoRemover:
     """Tests the repo remover to ensure it correctly handles repository removal operations
     """
 
-    @patch("pulp_manager.app.services.repo_remover.new_pulp_client")
-    def setup_method(self, method, mock_new_pulp_client):
+    @pytest.fixture(autouse=True)
+    def setup_repo_remover(self, db_session, mock_new_pulp_client):
         """Ensure an instance of RepoRemover is available for all tests along with
-        some mocked data
+        some mocked data. Uses the transactional db_session so changes made by each
+        test are rolled back
         """
-        def new_pulp_client(pulp_server: PulpServer):
-            return Pulp3Client(pulp_server.name, username=pulp_server.username, password="test")
-        
-        mock_new_pulp_client.side_effect = new_pulp_client
 
-         # Use a pulp server from the sample data insert
-        self.db = session()
+        # Use a pulp server from the sample data insert
+        self.db = db_session
         self.repo_remover = RepoRemover(self.db, "pulpserver1.domain.local")
 
-    def teardown_method(self):
-        """Ensure db connections are closed
-        """
-
-        self.db.close()
-        engine.dispose()
-    
     @patch("pulp_manager.app.services.reconciler.PulpReconciler.reconcile", autospec=True)
-    @patch("pulp_manager.app.services.repo_remover.delete_by_href_monitor")
-    def test_remove_repos(self, mock_delete_by_href_monitor,  mock_reconcile):
+    def test_remove_repos(self, mock_reconcile, monkeypatch, mock_new_pulp_client):
         """Tests the removal process of repositories in both dry run and actual deletion modes
         """
-        
+
+        # Only the number of deletes is checked, so a plain counter is used rather
+        # than a MagicMock recording every call
+        delete_count = [0]
+
+        def delete_by_href_monitor(*args, **kwargs):
+            delete_count[0] += 1
+
+        monkeypatch.setattr(
+            "pulp_manager.app.services.repo_remover.delete_by_href_monitor",
+            delete_by_href_monitor
+        )
+
         # There are two repos assigned ot the pulp server
         # named repo1 and repo2 from sample data
         # Test dry run mode
         self.repo_remover.remove_repos(regex_include="repo.*", dry_run=True)
-        mock_delete_by_href_monitor.assert_not_called()
+        assert delete_count[0] == 0
 
         # Test actual deletion mode
         self.repo_remover.remove_repos(regex_include="repo.*", dry_run=False)
-        assert mock_delete_by_href_monitor.call_count == 2
+        assert delete_count[0] == 2
         mock_reconcile.assert_called_once()
+        # Only the patched client created by the constructor was used
+        assert mock_new_pulp_client.call_count == 1
     
     @patch("pulp_manager.app.services.repo_remover.get_pulp_server_repos")
     def test_no_repos_found_for_removal(self, mock_get_pulp_server_repos):
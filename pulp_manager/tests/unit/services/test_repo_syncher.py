@@ -6,7 +6,7 @@ import socket
 from datetime import datetime, timedelta
 
 import pytest
-from mock import Mock, patch
+from unittest.mock import Mock, patch
 
 from pulp3_bindings.pulp3 import Pulp3Client
 from pulp3_bindings.pulp3.resources import (DebPublication, DebRepository,
@@ -16,7 +16,7 @@ from pulp3_bindings.pulp3.resources import (DebPublication, DebRepository,
 from pulp3_bindings.pulp3.resources import Task as Pulp3Task
 from pulp3_bindings.pulp3.resources import Task as PulpTask
 from pulp_manager.app.config import CONFIG
-from pulp_manager.app.database import engine, session
+from pulp_manager.app.database import session
 from pulp_manager.app.models import (PulpServer, PulpServerRepo,
                                      PulpServerRepoTask, Repo, Task, TaskStage)
 from pulp_manager.app.repositories import (PulpServerRepoRepository,
@@ -100,7 +100,6 @@ class TestRepoSyncher:
 
         db.commit()
         db.close()
-        engine.dispose()
 
 
     @patch("pulp_manager.app.services.repo_syncher.new_pulp_client")
@@ -127,7 +126,6 @@ class TestRepoSyncher:
         """
 
         self.db.close()
-        engine.dispose()
 
     def test_get_repos_to_sync_1(self):
         """Tests that given a PulpServer entity and regex_include/exclude tests that
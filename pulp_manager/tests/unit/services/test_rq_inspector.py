@@ -3,13 +3,20 @@
 
 import pytest
 import fakeredis
+from unittest.mock import MagicMock
+from redis import Redis
 from rq import Queue
+from rq.job import Job
 from rq_scheduler import Scheduler
 
 from pulp_manager.app.exceptions import PulpManagerInvalidPageSize, PulpManagerEntityNotFoundError
 from pulp_manager.app.services import RQInspector
 
 
+# One in memory redis server shared by all tests in the module, flushed before each test
+_SHARED_SERVER = fakeredis.FakeServer()
+
+
 # Test jobs to queue into fake redis
 def success_job():
     return True
@@ -18,50 +25,78 @@ def fail_job():
     raise Exception("oh no!")
 
 
-class TestJobManager:
-    """Tests for job manager functions
+def get_dummy_redis():
+    """Returns a MagicMock standing in for redis with canned responses for a single
+    default queue. Used for tests that only check RQInspector logic rather than
+    what rq has written to redis
     """
 
-    def setup_method(self):
-        """Replace redis with fakeredis
-        """
+    dummy_redis = MagicMock(spec=Redis)
+    dummy_redis.exists.return_value = True
+    dummy_redis.smembers.return_value = {b"rq:queue:default"}
+    return dummy_redis
+
+
+def _seed_completed_jobs(redis_conn: Redis):
+    """Generates some success and fail jobs in the default queue
+    """
 
-        fake_redis =  fakeredis.FakeStrictRedis()
+    # is_async=False instructs rq to instantly perform the job in the same thread instead of
+    # dispatching it to the workers
+    queue = Queue(name="default", is_async=False, connection=redis_conn)
+    queue.enqueue(success_job)
+    queue.enqueue(success_job)
+    queue.enqueue(fail_job)
 
-        # Generate some success and fail jobs
-        # is_async=False instructs rq to instantly perform the job in the same thread instead of
-        # dispatching it to the workers
-        queue = Queue(name="default", is_async=False, connection=fake_redis)
-        scheduler = Scheduler(queue=queue, connection=fake_redis)
 
-        job = queue.enqueue(success_job)
-        job = queue.enqueue(success_job)
-        job = queue.enqueue(fail_job)
+def _seed_scheduled_job(redis_conn: Redis, count: int=1):
+    """Adds cron jobs to the scheduler for the default queue and returns them. Only needed
+    by tests reading scheduled jobs, as creating the scheduler also registers the scheduler
+    instance in redis
+    """
 
-        # This menas a worker will be required to proces the job which will then leave it
-        # in a scheduled state
-        queue = Queue(name="default", is_async=True, connection=fake_redis)
+    # This menas a worker will be required to proces the job which will then leave it
+    # in a scheduled state
+    queue = Queue(name="default", is_async=True, connection=redis_conn)
+    scheduler = Scheduler(queue=queue, connection=redis_conn)
+    return [
         scheduler.cron(
             "0 0 * * *",
             func=success_job,
             queue_name="default"
         )
+        for _ in range(count)
+    ]
+
 
-        self.rq_inspector = RQInspector(fake_redis)
+class TestPageSize:
+    """Tests for the page size checks. These don't touch redis so don't need the
+    queues and jobs generated in TestRQInspectorIntegration.setup_method
+    """
 
-    def test_check_page_size_ok(self):
+    @pytest.mark.parametrize("size,raises", [(10, None), (100, PulpManagerInvalidPageSize)])
+    def test_check_page_size(self, size, raises):
         """Tests that when a page size given is not larger than the maximum then
-        no excpetion is thrown
+        no excpetion is thrown, and when it is larger an exception is thrown
         """
 
-        self.rq_inspector._check_page_size(10)
+        rq_inspector = RQInspector(get_dummy_redis())
+        if raises is None:
+            rq_inspector._check_page_size(size)
+        else:
+            with pytest.raises(raises):
+                rq_inspector._check_page_size(size)
+
 
-    def test_check_page_size_fail(self):
-        """Tests when a page size is larger tha nthe maximum then an exception is thrown
+class TestRQInspectorPure:
+    """Tests for RQInspector logic that don't depend on jobs having been processed by rq
+    """
+
+    def setup_method(self):
+        """Use a dummy redis with canned responses
         """
 
-        with pytest.raises(PulpManagerInvalidPageSize):
-            self.rq_inspector._check_page_size(100)
+        self.rq_inspector = RQInspector(get_dummy_redis())
 
     def test_get_queues(self):
         """Tests that a the correct number of queue is returned
@@ -84,6 +119,20 @@ class TestJobManager:
         with pytest.raises(PulpManagerEntityNotFoundError):
             self.rq_inspector.get_queue("defaulting")
 
+
+class TestRQInspectorIntegration:
+    """Tests for RQInspector against jobs that have been run through rq on fakeredis
+    """
+
+    def setup_method(self):
+        """Replace redis with fakeredis
+        """
+
+        self.fake_redis = fakeredis.FakeStrictRedis(server=_SHARED_SERVER)
+        self.fake_redis.flushall()
+        _seed_completed_jobs(self.fake_redis)
+        self.rq_inspector = RQInspector(self.fake_redis)
+
     def test_get_queue_stats(self):
         """Checks the correct stats about a queue are returned
         """
@@ -136,5 +185,46 @@ class TestJobManager:
         """Tests the jobs are returned from the scheduler queue
         """
 
+        _seed_scheduled_job(self.fake_redis)
         result = self.rq_inspector.get_scheduled_jobs("default")
         assert len(result["items"]) == 1
+
+    @pytest.mark.parametrize("page,expected_items", [(1, 2), (2, 2), (3, 1), (4, 0)])
+    def test_get_scheduled_jobs_paged(self, page, expected_items):
+        """Tests each page of scheduled jobs contains the jobs for that page, with the last
+        page being partial, and the total is all the scheduled jobs
+        """
+
+        scheduled_jobs = _seed_scheduled_job(self.fake_redis, 5)
+        all_job_ids = [job.id for job in scheduled_jobs]
+
+        result = self.rq_inspector.get_scheduled_jobs("default", page, 2)
+        assert len(result["items"]) == expected_items
+        assert result["page"] == page
+        assert result["page_size"] == 2
+        assert result["total"] == 5
+        for job in result["items"]:
+            assert job["id"] in all_job_ids
+
+        # Pages don't overlap
+        page_ids = {
+            job["id"]
+            for page_num in range(1, 4)
+            for job in self.rq_inspector.get_scheduled_jobs("default", page_num, 2)["items"]
+        }
+        assert page_ids == set(all_job_ids)
+
+    def test_get_scheduled_jobs_expired_job(self):
+        """Tests a scheduled job whose job hash has expired is removed from the scheduler,
+        and isn't counted in the total or left out of a full page
+        """
+
+        scheduled_jobs = _seed_scheduled_job(self.fake_redis, 3)
+        expired_job = scheduled_jobs[0]
+        self.fake_redis.delete(Job.redis_job_namespace_prefix + expired_job.id)
+
+        result = self.rq_inspector.get_scheduled_jobs("default", 1, 2)
+        assert len(result["items"]) == 2
+        assert result["total"] == 2
+        assert expired_job.id not in [job["id"] for job in result["items"]]
+        assert self.fake_redis.zscore(Scheduler.scheduled_jobs_key, expired_job.id) is None
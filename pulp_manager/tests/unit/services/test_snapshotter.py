@@ -3,14 +3,15 @@
 
 import pytest
 
+from collections import namedtuple
 from datetime import datetime
-from mock import patch
+from types import SimpleNamespace
 from pulp3_bindings.pulp3 import Pulp3Client
 from pulp3_bindings.pulp3.resources import (
     DebRemote, DebRepository, RpmRepository, Task as Pulp3Task
 )
 
-from pulp_manager.app.database import session, engine
+from pulp_manager.app.database import session
 from pulp_manager.app.exceptions import PulpManagerSnapshotError
 from pulp_manager.app.models import Repo, PulpServer, PulpServerRepo, Task
 from pulp_manager.app.services import Snapshotter
@@ -20,16 +21,85 @@ from pulp_manager.app.repositories import (
 )
 
 
-class TestSnapshotter:
-    """Test class for snapshotter
+SnapshotSeed = namedtuple(
+    "SnapshotSeed", "pulp_server_id pulp_server_repo1_id pulp_server_repo2_id"
+)
+
+# Tests don't check timestamps, so use a fixed one to keep them deterministic
+FIXED_DT = datetime(2024, 1, 1)
+# Pulp task responses are only read by the snapshotter, so are built once and shared
+RUNNING_COPY_TASK = Pulp3Task(**{
+    "pulp_href": "/pulp/api/v3/tasks/123",
+    "pulp_created": FIXED_DT,
+    "state": "running",
+    "name": "repo-copy",
+    "logging_cid": "123"
+})
+RUNNING_PUBLISH_TASK = RUNNING_COPY_TASK.copy(update={"name": "repo-publish"})
+
+
+def get_deb_repo(pulp_client, href, params=None):
+    """Side effect for get_repo returning the deb source and snapshot repos
     """
 
-    @classmethod
-    def setup_class(cls):
-        """Add some additional sample data to be used for tests
-        """
+    # The source repo is the first that is being returned in the if statement
+    if href == "/pulp/api/v3/repositories/deb/apt/123":
+        return DebRepository(**{
+            "pulp_href": "/pulp/api/v3/repositories/deb/apt/123",
+            "name": "deb-repo",
+            "remote": "/pulp/api/v3/remotes/deb/apt/123"
+        })
+
+    return DebRepository(**{
+        "pulp_href": "/pulp/api/v3/repositories/deb/apt/456",
+        "name": "snap-deb-repo"
+    })
+
+
+@pytest.fixture
+def mock_get_repo(mocker):
+    """Patches get_repo used by the snapshotter
+    """
+
+    return mocker.patch("pulp_manager.app.services.snapshotter.get_repo", autospec=True)
+
+
+@pytest.fixture
+def mock_get_remote(mocker):
+    """Patches get_remote used by the snapshotter
+    """
+
+    return mocker.patch("pulp_manager.app.services.snapshotter.get_remote", autospec=True)
+
+
+@pytest.fixture
+def mock_get_task(mocker):
+    """Patches get_task used by the snapshotter
+    """
+
+    return mocker.patch("pulp_manager.app.services.snapshotter.get_task", autospec=True)
+
+
+@pytest.fixture
+def mock_create_publication_from_repo_version(mocker):
+    """Patches the PulpManager create_publication_from_repo_version used by the snapshotter
+    """
+
+    return mocker.patch(
+        "pulp_manager.app.services.snapshotter.PulpManager.create_publication_from_repo_version",
+        autospec=True
+    )
 
-        db = session()
+
+# Module scoped rather than session scoped, as apply_migrations downgrades the db
+# at the end of each module which removes the seeded data
+@pytest.fixture(scope="module")
+def seed_pulp_server(apply_migrations: None) -> SnapshotSeed:
+    """Adds a snapshot supported pulp server with two repos, once for the module
+    """
+
+    db = session()
+    try:
         pulp_server_repository = PulpServerRepository(db)
         repo_repository = RepoRepository(db)
         pulp_server_repo_repository = PulpServerRepoRepository(db)
@@ -41,65 +111,109 @@ class TestSnapshotter:
             "snapshot_supported": True,
             "max_concurrent_snapshots": 2
         })
+        db.flush()
+
+        # Repos are inserted with a single INSERT ... RETURNING per table
+        repos = {repo.name: repo for repo in repo_repository.bulk_add([
+            {"name": "ext-test-rpm-repo", "repo_type": "rpm"},
+            {"name": "existing-snap-ext-test-rpm-repo", "repo_type": "rpm"}
+        ])}
+
+        pulp_server_repos = {
+            pulp_server_repo.repo_href: pulp_server_repo
+            for pulp_server_repo in pulp_server_repo_repository.bulk_add([
+                {
+                    "pulp_server_id": pulp_server.id,
+                    "repo_id": repos["ext-test-rpm-repo"].id,
+                    "repo_href": "/pulp/api/v3/repositories/rpm/rpm/123"
+                },
+                {
+                    "pulp_server_id": pulp_server.id,
+                    "repo_id": repos["existing-snap-ext-test-rpm-repo"].id,
+                    "repo_href": "/pulp/api/v3/repositories/rpm/rpm/456"
+                }
+            ])
+        }
 
-        repo1 = repo_repository.add(**{
-            "name": "ext-test-rpm-repo",
-            "repo_type": "rpm"
-        })
-
-        repo2 = repo_repository.add(**{
-            "name": "existing-snap-ext-test-rpm-repo",
-            "repo_type": "rpm"
-        })
+        db.commit()
 
-        pulp_server_repo1 = pulp_server_repo_repository.add(**{
-            "pulp_server": pulp_server,
-            "repo": repo1,
-            "repo_href": "/pulp/api/v3/repositories/rpm/rpm/123"
-        })
+        return SnapshotSeed(
+            pulp_server.id,
+            pulp_server_repos["/pulp/api/v3/repositories/rpm/rpm/123"].id,
+            pulp_server_repos["/pulp/api/v3/repositories/rpm/rpm/456"].id
+        )
+    finally:
+        db.close()
 
-        pulp_server_repo2 = pulp_server_repo_repository.add(**{
-            "pulp_server": pulp_server,
-            "repo": repo2,
-            "repo_href": "/pulp/api/v3/repositories/rpm/rpm/456"
-        })
 
-        db.commit()
-
-        cls.pulp_server_id = pulp_server.id
-        cls.pulp_server_repo1_id = pulp_server_repo1.id
-        cls.pulp_server_repo2_id = pulp_server_repo2.id
+@pytest.mark.usefixtures("seed_pulp_server")
+class TestSnapshotter:
+    """Test class for snapshotter
+    """
 
-        db.close()
-        engine.dispose()
-
-    @patch("pulp_manager.app.services.pulp_manager.new_pulp_client")
-    @patch("pulp_manager.app.services.pulp_manager.PulpManager._get_deb_signing_service")
-    @patch("pulp_manager.app.services.snapshotter.new_pulp_client")
-    def setup_method(self, method, mock_new_pulp_client, mock_get_deb_signing_service,
-            mock_pulp_manager_new_pulp_client):
-        """Setup fake repository and mocks
+    @pytest.fixture(scope="class", autouse=True)
+    def patch_pulp_clients(self, class_mocker):
+        """Patches the pulp clients and the deb signing service lookup once for the class,
+        so constructing a Snapshotter for each test only queries the db
         """
 
         def new_pulp_client(pulp_server: PulpServer):
             return Pulp3Client(pulp_server.name, username=pulp_server.username, password="test")
 
-        mock_new_pulp_client.side_effect = new_pulp_client
-        mock_pulp_manager_new_pulp_client.side_effect = new_pulp_client
-        mock_get_deb_signing_service.return_value = "/pulp/api/v3/signing-services/123"
+        class_mocker.patch(
+            "pulp_manager.app.services.snapshotter.new_pulp_client", side_effect=new_pulp_client
+        )
+        class_mocker.patch(
+            "pulp_manager.app.services.pulp_manager.new_pulp_client", side_effect=new_pulp_client
+        )
+        class_mocker.patch(
+            "pulp_manager.app.services.pulp_manager.PulpManager._get_deb_signing_service",
+            return_value="/pulp/api/v3/signing-services/123"
+        )
+
+    @pytest.fixture(scope="class")
+    def class_session(self, class_connection):
+        """Session shared by all tests in the class. It joins the class connection with a
+        SAVEPOINT, and is closed after each test so it starts again inside that test's
+        own SAVEPOINT
+        """
 
-        self.db = session()
-        self.pulp_server_repo_repository = PulpServerRepoRepository(self.db)
-        self.task_repository = TaskRepository(self.db)
-        self.task_stage_repository = TaskStageRepository(self.db)
-        self.snapshotter = Snapshotter(self.db, "pulp_server.domain.local")
+        db = session(bind=class_connection, join_transaction_mode="create_savepoint")
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @pytest.fixture(scope="class")
+    def repos(self, class_session):
+        """Repositories used by tests to add and look up entities. They only hold the
+        class session, so are created once
+        """
 
-    def teardown_method(self):
-        """Ensure db connections are closed
+        return SimpleNamespace(
+            pulp_server_repo=PulpServerRepoRepository(class_session),
+            task=TaskRepository(class_session),
+            task_stage=TaskStageRepository(class_session)
+        )
+
+    @pytest.fixture(autouse=True)
+    def setup_snapshotter(self, class_connection, class_session, repos):
+        """Setup the snapshotter for the test. The test runs inside a SAVEPOINT on the
+        class connection which is rolled back once it completes, so the tasks committed
+        by one test aren't seen by the next
         """
 
+        nested = class_connection.begin_nested()
+        self.db = class_session
+        self.repos = repos
+        self.snapshotter = Snapshotter(self.db, "pulp_server.domain.local")
+
+        yield
+
+        # Closing ends the session's own SAVEPOINT and clears its identity map, so
+        # nothing loaded by this test is reused by the next
         self.db.close()
-        engine.dispose()
+        nested.rollback()
 
     def test_get_supported_snapshot_repo_type(self):
         """Tests that a list returned containing the repo types that are supported for snapshot
@@ -110,24 +224,45 @@ class TestSnapshotter:
         for repo_type in supported_repos:
             assert isinstance(repo_type, str)
 
-    @patch("pulp_manager.app.services.reconciler.PulpReconciler.reconcile", autospec=True)
-    def test_do_reconcile(self, mock_reconcile):
+    def test_do_reconcile(self, mocker):
         """Tests when do reconcile is called, if there are no errors it completes
         successfully
         """
 
-        self.snapshotter._do_reconcile
+        mock_reconcile = mocker.patch(
+            "pulp_manager.app.services.reconciler.PulpReconciler.reconcile", autospec=True
+        )
+
+        task = self.repos.task.add(**{
+            "name": "snapshot repos",
+            "task_type": "repo_snapshot",
+            "state": "running",
+            "date_started": FIXED_DT,
+            "task_args": {}
+        })
+        self.db.flush()
+        self.snapshotter._task = task
+
+        self.snapshotter._do_reconcile()
+
+        assert mock_reconcile.call_count == 1
+        task_stage = self.repos.task_stage.first(**{"task_id": task.id})
+        assert task_stage.detail == {"msg": "completed repo reconcile"}
 
-    @patch("pulp_manager.app.services.snapshotter.get_repo", autospec=True)
-    @patch("pulp_manager.app.services.PulpManager.create_or_update_repository", autospec=True)
-    @patch("pulp_manager.app.services.snapshotter.get_all_repos", autospec=True)
-    @patch("pulp_manager.app.services.snapshotter.copy_repo", autospec=True)
-    def test_start_snapshot(self, mock_copy_repo, mock_get_all_repos,
-            mock_create_or_update_repository, mock_get_repo):
+    def test_start_snapshot(self, mocker, mock_get_repo, seed_pulp_server):
         """Tests that when a snapshot is started, a PulpManager Task entity is returned
         containing the details about the snapshot task
         """
 
+        mock_create_or_update_repository = mocker.patch(
+            "pulp_manager.app.services.PulpManager.create_or_update_repository", autospec=True
+        )
+        mock_get_all_repos = mocker.patch(
+            "pulp_manager.app.services.snapshotter.get_all_repos", autospec=True
+        )
+        # Only the return value matters, so no need for autospec to inspect the signature
+        mock_copy_repo = mocker.patch("pulp_manager.app.services.snapshotter.copy_repo")
+
         mock_get_repo.return_value = RpmRepository(**{
             "pulp_href": "/pulp/api/v3/repositories/rpm/rpm/123",
             "name": "ext-test-rpm-repo"
@@ -160,22 +295,14 @@ class TestSnapshotter:
             "name": "my-snap-ext-test-rpm-repo"
         })]
 
-        mock_copy_repo.return_value = Pulp3Task(**{
-            "pulp_href": "/pulp/api/v3/tasks/123",
-            "pulp_created": datetime.utcnow(),
-            "state": "running",
-            "name": "repo-copy",
-            "logging_cid": "123"
-        })
+        mock_copy_repo.return_value = RUNNING_COPY_TASK
 
-        repo = self.pulp_server_repo_repository.first(**{"id": self.pulp_server_repo1_id})
+        repo = self.db.get(PulpServerRepo, seed_pulp_server.pulp_server_repo1_id)
 
         result = self.snapshotter._start_snapshot(repo, "my-snap")
         assert isinstance(result, Task)
         assert result.name == "snapshot ext-test-rpm-repo"
 
-    @patch("pulp_manager.app.services.snapshotter.get_repo", autospec=True)
-    @patch("pulp_manager.app.services.snapshotter.PulpManager.create_publication_from_repo_version", autospec=True)
     def test_start_publication(self, mock_create_publication_from_repo_version, mock_get_repo):
         """Tests that when _start_publication is called, if everything is fine no errors are thrown
         """
@@ -184,308 +311,142 @@ class TestSnapshotter:
             "pulp_href": "/pulp/api/v3/repositories/rpm/rpm/123",
             "name": "my-snap-ext-test-rpm-repo"
         })
-        task = self.task_repository.add(**{
+        task = self.repos.task.add(**{
             "name": "snapshot ext-test-rpm-repo",
             "task_type": "repo_snapshot",
             "state": "running",
-            "date_started": datetime.utcnow(),
+            "date_started": FIXED_DT,
             "task_args": {
                 "dest_repo_href": "/pulp/api/v3/repositories/rpm/rpm/123"
             }
         })
-        self.db.commit()
+        self.db.flush()
 
-        mock_create_publication_from_repo_version.return_value = Pulp3Task(**{
-            "pulp_href": "/pulp/api/v3/tasks/123",
-            "pulp_created": datetime.utcnow(),
-            "state": "running",
-            "name": "repo-publish",
-            "logging_cid": "123"
-        })
+        mock_create_publication_from_repo_version.return_value = RUNNING_PUBLISH_TASK
 
         self.snapshotter._start_publication(task)
 
-    @patch("pulp_manager.app.services.snapshotter.get_remote", autospec=True)
-    @patch("pulp_manager.app.services.snapshotter.get_repo", autospec=True)
-    @patch("pulp_manager.app.services.snapshotter.PulpManager.create_publication_from_repo_version", autospec=True)
-    def test_start_publication_deb_none_flat(self, mock_create_publication_from_repo_version,
-            mock_get_repo, mock_get_remote):
-        """Tests that when _start_publication is called, and the repo isn't flat the args are called to
-        start publication
-        """
-
-        def mock_get_repo_side_effect(pulp_client, href, params=None):
-            # The source repo is the first that is being returned in the if statement
-            if href == "/pulp/api/v3/repositories/deb/apt/123":
-                return DebRepository(**{
-                    "pulp_href": "/pulp/api/v3/repositories/deb/apt/123",
-                    "name": "deb-none-flat",
-                    "remote": "/pulp/api/v3/remotes/deb/apt/123"
-                })
-            else:
-                return DebRepository(**{
-                    "pulp_href": "/pulp/api/v3/repositories/deb/apt/456",
-                    "name": "snap-deb-none-flat"
-                })
-
-        mock_get_repo.side_effect = mock_get_repo_side_effect
-
-        mock_get_remote.return_value = DebRemote(**{
-            "pulp_href": "/pulp/api/v3/remotes/deb/apt/123",
-            "name": "deb-none-flat",
-            "url": "https://deb-remote.domain.local",
-            "policy": "immediate", 
-            "distributions": "focal"
-        })
-
-        mock_create_publication_from_repo_version.return_value = Pulp3Task(**{
-            "pulp_href": "/pulp/api/v3/tasks/123",
-            "pulp_created": datetime.utcnow(),
-            "state": "running",
-            "name": "repo-publish",
-            "logging_cid": "123"
-        })
-
-        task = self.task_repository.add(**{
-            "name": "snapshot deb-none-flat",
-            "task_type": "repo_snapshot",
-            "state": "running",
-            "date_started": datetime.utcnow(),
-            "task_args": {
-                "source_repo_href": "/pulp/api/v3/repositories/deb/apt/123",
-                "dest_repo_href": "/pulp/api/v3/repositories/deb/apt/456"
-            }
-        })
-        self.db.commit()
-
-        self.snapshotter._start_publication(task)
-        mock_create_publication_from_repo_version_call_args, mock_create_publication_from_repo_version_call_kwargs = mock_create_publication_from_repo_version.call_args
-
-        # Check is_flat_repo is false, checking fourth arg, as need to account for self
-        assert mock_create_publication_from_repo_version_call_args[3] == False
-
-    @patch("pulp_manager.app.services.snapshotter.get_remote", autospec=True)
-    @patch("pulp_manager.app.services.snapshotter.get_repo", autospec=True)
-    @patch("pulp_manager.app.services.snapshotter.PulpManager.create_publication_from_repo_version", autospec=True)
-    def test_start_publication_deb_flat(self, mock_create_publication_from_repo_version,
-            mock_get_repo, mock_get_remote):
-        """Tests that when _start_publication is called, and the repo isn't flat the args are called to
-        start publication
+    @pytest.mark.parametrize("dist,is_flat", [("focal", False), ("/", True)])
+    def test_start_publication_deb(self, dist, is_flat,
+            mock_create_publication_from_repo_version, mock_get_repo, mock_get_remote):
+        """Tests that when _start_publication is called for a deb repo, whether the repo is
+        flat is passed through to start the publication
         """
 
-        def mock_get_repo_side_effect(pulp_client, href, params=None):
-            # The source repo is the first that is being returned in the if statement
-            if href == "/pulp/api/v3/repositories/deb/apt/123":
-                return DebRepository(**{
-                    "pulp_href": "/pulp/api/v3/repositories/deb/apt/123",
-                    "name": "deb-none-flat",
-                    "remote": "/pulp/api/v3/remotes/deb/apt/123"
-                })
-            else:
-                return DebRepository(**{
-                    "pulp_href": "/pulp/api/v3/repositories/deb/apt/456",
-                    "name": "snap-deb-none-flat"
-                })
-
-        mock_get_repo.side_effect = mock_get_repo_side_effect
+        mock_get_repo.side_effect = get_deb_repo
 
         mock_get_remote.return_value = DebRemote(**{
             "pulp_href": "/pulp/api/v3/remotes/deb/apt/123",
-            "name": "deb-flat",
+            "name": "deb-repo",
             "url": "https://deb-remote.domain.local",
-            "policy": "immediate", 
-            "distributions": "/"
+            "policy": "immediate",
+            "distributions": dist
         })
 
-        mock_create_publication_from_repo_version.return_value = Pulp3Task(**{
-            "pulp_href": "/pulp/api/v3/tasks/123",
-            "pulp_created": datetime.utcnow(),
-            "state": "running",
-            "name": "repo-publish",
-            "logging_cid": "123"
-        })
+        mock_create_publication_from_repo_version.return_value = RUNNING_PUBLISH_TASK
 
-        task = self.task_repository.add(**{
-            "name": "snapshot deb-none-flat",
+        task = self.repos.task.add(**{
+            "name": "snapshot deb-repo",
             "task_type": "repo_snapshot",
             "state": "running",
-            "date_started": datetime.utcnow(),
+            "date_started": FIXED_DT,
             "task_args": {
                 "source_repo_href": "/pulp/api/v3/repositories/deb/apt/123",
                 "dest_repo_href": "/pulp/api/v3/repositories/deb/apt/456"
             }
         })
-        self.db.commit()
+        self.db.flush()
 
         self.snapshotter._start_publication(task)
-        mock_create_publication_from_repo_version_call_args, mock_create_publication_from_repo_version_call_kwargs = mock_create_publication_from_repo_version.call_args
-
-        # Check is_flat_repo is True, checking fourth arg, as need to account for self
-        assert mock_create_publication_from_repo_version_call_args[3] == True
-
-    @patch("pulp_manager.app.services.snapshotter.get_task", autospec=True)
-    def test_progress_snapshot_copy_still_in_progress(self, mock_get_task):
-        """Tests that when a task is currently still in progress False is returned
-        indicating that the _progress_snapshot needs to be called again in the future
-        """
-
-        mock_get_task.return_value = Pulp3Task(**{
-            "pulp_href": "/pulp/api/v3/tasks/123",
-            "pulp_created": datetime.utcnow(),
-            "state": "running",
-            "name": "repo-copy",
-            "logging_cid": "123"
-        })
-
-        task = self.task_repository.add(**{
-            "name": "snapshot ext-test-rpm-repo",
-            "task_type": "repo_snapshot",
-            "state": "running",
-            "date_started": datetime.utcnow(),
-            "task_args": {
-                "dest_repo_href": "/pulp/api/v3/repositories/rpm/rpm/123"
-            }
-        })
-        task_stage = self.task_stage_repository.add(**{
-            "name": "repo snapshot",
-            "detail": {"task_href": "/pulp/api/v3/task/123"},
-            "task": task
-        })
-
-        self.db.commit()
-
-        result = self.snapshotter._progress_snapshot(task)
-        assert result == False
-
-    @patch("pulp_manager.app.services.snapshotter.get_task", autospec=True)
-    def test_progress_snapshot_copy_task_failed(self, mock_get_task):
-        """Tests that if the task failed on the target pulp server, then True is returned
-        indicating that the task completed. The task is updated in the db with the state
-        as failed
-        """
-
-        mock_get_task.return_value = Pulp3Task(**{
-            "pulp_href": "/pulp/api/v3/tasks/123",
-            "pulp_created": datetime.utcnow(),
-            "state": "running",
-            "name": "repo-copy",
-            "logging_cid": "123"
-        })
-
-        task = self.task_repository.add(**{
-            "name": "snapshot ext-test-rpm-repo",
-            "task_type": "repo_snapshot",
-            "state": "running",
-            "date_started": datetime.utcnow(),
-            "task_args": {
-                "dest_repo_href": "/pulp/api/v3/repositories/rpm/rpm/123"
-            }
-        })
-        task_stage = self.task_stage_repository.add(**{
-            "name": "repo snapshot",
-            "detail": {"task_href": "/pulp/api/v3/task/123"},
-            "task": task
-        })
-
-        self.db.commit()
-
-        mock_get_task.return_value = Pulp3Task(**{
-            "pulp_href": "/pulp/api/v3/tasks/123",
-            "pulp_created": datetime.utcnow(),
-            "state": "failed",
-            "name": "repo-copy",
-            "logging_cid": "123"
-        })
-
-        result = self.snapshotter._progress_snapshot(task)
-        assert result == True
-        assert task.state == "failed"
 
-    @patch("pulp_manager.app.services.snapshotter.get_task", autospec=True)
-    @patch("pulp_manager.app.services.snapshotter.Snapshotter._start_publication", autospec=True)
-    def test_progress_snapshot_copy_start_publication(self, mock_start_publication, mock_get_task):
-        """Tests that if a repo copy task has completed successfully then _start_publcation is called
+        # Check is_flat_repo, checking fourth arg, as need to account for self
+        assert mock_create_publication_from_repo_version.call_args[0][3] == is_flat
+
+    @pytest.mark.parametrize(
+        "pulp_task_state,pulp_task_name,stage_name,expected_result,expected_task_state,"
+        "expect_publication_started",
+        [
+            # Copy still running, so the snapshot needs to be progressed again later
+            ("running", "repo-copy", "repo snapshot", False, "running", False),
+            # Copy failed on the pulp server, so the task completes and is marked as failed
+            ("failed", "repo-copy", "repo snapshot", True, "failed", False),
+            # Copy completed, so the publication is started
+            ("completed", "repo-copy", "repo snapshot", False, "running", True),
+            # Publication completed, so there are no more stages to progress
+            ("completed", "repo-publish", "repo publication", True, "completed", False)
+        ]
+    )
+    def test_progress_snapshot(self, pulp_task_state, pulp_task_name, stage_name,
+            expected_result, expected_task_state, expect_publication_started, mocker,
+            mock_get_task):
+        """Tests that _progress_snapshot moves the snapshot on to the next stage based on
+        the state of the task on the pulp server for the current stage, and returns whether
+        the snapshot has finished
         """
 
-        mock_get_task.return_value = Pulp3Task(**{
-            "pulp_href": "/pulp/api/v3/tasks/123",
-            "pulp_created": datetime.utcnow(),
-            "state": "completed",
-            "name": "repo-copy",
-            "logging_cid": "123"
-        })
-
-        task = self.task_repository.add(**{
-            "name": "snapshot ext-test-rpm-repo",
-            "task_type": "repo_snapshot",
-            "state": "running",
-            "date_started": datetime.utcnow(),
-            "task_args": {
-                "dest_repo_href": "/pulp/api/v3/repositories/rpm/rpm/123"
-            }
-        })
-        task_stage = self.task_stage_repository.add(**{
-            "name": "repo snapshot",
-            "detail": {"task_href": "/pulp/api/v3/task/123"},
-            "task": task
-        })
-
-        result = self.snapshotter._progress_snapshot(task)
-
-        assert mock_start_publication.call_count == 1
-        assert result == False
-
+        mock_start_publication = mocker.patch(
+            "pulp_manager.app.services.snapshotter.Snapshotter._start_publication", autospec=True
+        )
 
-    @patch("pulp_manager.app.services.snapshotter.get_task", autospec=True)
-    def test_progress_snapshot_copy_still_task_completed(self, mock_get_task):
-        """Tests that when the publication has completed successfully, the task is marked as
-        completed in the DB and True is returned indicating there are no more stages to progress
-        for the snapshot of the repo
-        """
-
-        mock_get_task.return_value = Pulp3Task(**{
-            "pulp_href": "/pulp/api/v3/tasks/123",
-            "pulp_created": datetime.utcnow(),
-            "state": "completed",
-            "name": "repo-publish",
-            "logging_cid": "123"
-        })
+        mock_get_task.return_value = RUNNING_COPY_TASK.copy(
+            update={"state": pulp_task_state, "name": pulp_task_name}
+        )
 
-        task = self.task_repository.add(**{
+        task = self.repos.task.add(**{
             "name": "snapshot ext-test-rpm-repo",
             "task_type": "repo_snapshot",
             "state": "running",
-            "date_started": datetime.utcnow(),
+            "date_started": FIXED_DT,
             "task_args": {
                 "dest_repo_href": "/pulp/api/v3/repositories/rpm/rpm/123"
             }
         })
-        task_stage = self.task_stage_repository.add(**{
-            "name": "repo publication",
+        self.repos.task_stage.add(**{
+            "name": stage_name,
             "detail": {"task_href": "/pulp/api/v3/task/123"},
             "task": task
         })
+        self.db.flush()
 
         result = self.snapshotter._progress_snapshot(task)
 
-        assert result == True
-        assert task.state == "completed"
-
-    @patch("pulp_manager.app.services.snapshotter.sleep")
-    @patch("pulp_manager.app.services.snapshotter.Snapshotter._start_snapshot")
-    @patch("pulp_manager.app.services.snapshotter.Snapshotter._progress_snapshot", autospec=True)
-    def test_do_snapshot_repos(self, mock_progress_snapshot, mock_start_snapshot, mock_sleep):
+        assert result == expected_result
+        assert task.state == expected_task_state
+        assert mock_start_publication.called == expect_publication_started
+
+    @pytest.mark.parametrize("fail_repo2,expected_state,expected_progress_calls", [
+        (False, "completed", 2),
+        # A repo that errors when starting its snapshot fails the whole task
+        (True, "failed", 1)
+    ])
+    def test_do_snapshot_repos(self, fail_repo2, expected_state, expected_progress_calls,
+            mocker, seed_pulp_server):
         """Tests that when a list of repos snapshot without errors _task instance variable
-        on the syncher is marked as completed
+        on the syncher is marked as completed, and if a repo errors during the snapshot
+        process it is marked as failed
         """
 
+        # Nothing checks the sleeps, so swallow them without recording calls
+        mocker.patch(
+            "pulp_manager.app.services.snapshotter.sleep", new=lambda *args, **kwargs: None
+        )
+        mock_start_snapshot = mocker.patch(
+            "pulp_manager.app.services.snapshotter.Snapshotter._start_snapshot"
+        )
+        mock_progress_snapshot = mocker.patch(
+            "pulp_manager.app.services.snapshotter.Snapshotter._progress_snapshot", autospec=True
+        )
+
         def start_snapshot(repo_to_snapshot, repo_snapshot_name):
             """Side effect for the patched out _start_snapshot on the Snapshotter class
             """
 
-            task = self.task_repository.add(**{
+            if fail_repo2 and repo_to_snapshot.id == seed_pulp_server.pulp_server_repo2_id:
+                raise Exception("error")
+
+            task = self.repos.task.add(**{
                 "name": f"snapshot {repo_to_snapshot.name}",
-                "date_started": datetime.utcnow(),
+                "date_started": FIXED_DT,
                 "task_type": "repo_snapshot",
                 "state": "running",
                 "task_args": {
@@ -493,97 +454,36 @@ class TestSnapshotter:
                 }
             })
 
-            self.db.commit()
+            self.db.flush()
             return task
 
         # Need to have populated a parent snapshot task otherwise
         # method call to create child task will fail when it is adding
         # a snapshot staage
-        parent_task = self.task_repository.add(**{
+        parent_task = self.repos.task.add(**{
             "name": "snapshot repos",
             "task_type": "repo_snapshot",
             "state": "running",
-            "date_started": datetime.utcnow(),
+            "date_started": FIXED_DT,
             "task_args": {
                 "dest_repo_href": "/pulp/api/v3/repositories/rpm/rpm/123"
             }
         })
-        self.db.commit()
+        self.db.flush()
         self.snapshotter._task = parent_task
 
         mock_start_snapshot.side_effect = start_snapshot
         mock_progress_snapshot.return_value = True
 
-        repos_to_snapshot = self.pulp_server_repo_repository.filter(**{
-            "pulp_server_id": self.pulp_server_id
-        })
-
-        self.snapshotter._do_snapshot_repos("test-", repos_to_snapshot)
-
-        assert mock_start_snapshot.call_count == 2
-        assert mock_progress_snapshot.call_count == 2
-        assert self.snapshotter._task.state == "completed"
-
-        # reset _task
-        self.snapshotter._task = None
-
-    @patch("pulp_manager.app.services.snapshotter.sleep")
-    @patch("pulp_manager.app.services.snapshotter.Snapshotter._start_snapshot")
-    @patch("pulp_manager.app.services.snapshotter.Snapshotter._progress_snapshot", autospec=True)
-    def test_do_snapshot_repos_fail(self, mock_progress_snapshot, mock_start_snapshot, mock_sleep):
-        """Tests that if a repo errors during the snapshot process, the _task instnace variable is
-        marked as failed
-        """
-
-        def start_snapshot(repo_to_snapshot, repo_snapshot_name):
-            """Side effect for the patched out _start_snapshot on the Snapshotter class
-            """
-
-            # Fail on second repo in sample data
-            if repo_to_snapshot.id == self.pulp_server_repo2_id:
-                raise Exception("error")
-
-            task = self.task_repository.add(**{
-                "name": f"snapshot {repo_to_snapshot.name}",
-                "date_started": datetime.utcnow(),
-                "task_type": "repo_snapshot",
-                "state": "running",
-                "task_args": {
-                    "source_repo_href": "/pulp/api/v3/repositories/rpm/rpm/123",
-                }
-            })
-
-            self.db.commit()
-            return task
-
-        mock_start_snapshot.side_effect = start_snapshot
-        mock_progress_snapshot.return_value = True
-        repos_to_snapshot = self.pulp_server_repo_repository.filter(**{
-            "pulp_server_id": self.pulp_server_id
+        repos_to_snapshot = self.repos.pulp_server_repo.filter(**{
+            "pulp_server_id": seed_pulp_server.pulp_server_id
         })
 
-        # Need to have populated a parent snapshot task otherwise
-        # method call to create child task will fail when it is adding
-        # a snapshot staage
-        parent_task = self.task_repository.add(**{
-            "name": "snapshot repos",
-            "task_type": "repo_snapshot",
-            "state": "running",
-            "date_started": datetime.utcnow(),
-            "task_args": {
-                "dest_repo_href": "/pulp/api/v3/repositories/rpm/rpm/123"
-            }
-        })
-        self.db.commit()
-        self.snapshotter._task = parent_task
         self.snapshotter._do_snapshot_repos("test-", repos_to_snapshot)
 
         assert mock_start_snapshot.call_count == 2
-        assert mock_progress_snapshot.call_count == 1
-        assert self.snapshotter._task.state == "failed"
-
-        # reset _task
-        self.snapshotter._task = None
+        assert mock_progress_snapshot.call_count == expected_progress_calls
+        assert self.snapshotter._task.state == expected_state
 
     def test_snapshot_allowed_ok(self):
         """Tests when then are no repos that match the snapshot prefix no error is thrown
@@ -598,21 +498,32 @@ class TestSnapshotter:
         with pytest.raises(PulpManagerSnapshotError):
             self.snapshotter._snapshot_allowed("existing-snap")
 
-    @patch("pulp_manager.app.services.snapshotter.Snapshotter._do_reconcile", autospec=True)
-    @patch("pulp_manager.app.services.snapshotter.Snapshotter._do_snapshot_repos", autospec=True)
-    def test_snapshot_repos(self, mock_do_snapshot_repos, mock_do_reconcile):
+    def test_snapshot_repos(self, mocker):
         """Tests that if no errors are raised during the snapshoting creation function completes
         successfully
         """
 
+        mocker.patch(
+            "pulp_manager.app.services.snapshotter.Snapshotter._do_reconcile", autospec=True
+        )
+        mocker.patch(
+            "pulp_manager.app.services.snapshotter.Snapshotter._do_snapshot_repos", autospec=True
+        )
+
         self.snapshotter.snapshot_repos(snapshot_prefix="my-test", regex_include="^ext-")
 
-    @patch("pulp_manager.app.services.snapshotter.Snapshotter._do_reconcile", side_effect=Exception, autospec=True)
-    @patch("pulp_manager.app.services.snapshotter.Snapshotter._do_snapshot_repos", autospec=True)
-    def test_snapshot_repos_fail(self, mock_do_snapshot_repos, mock_do_reconcile):
+    def test_snapshot_repos_fail(self, mocker):
         """Tests that if errors are raised during the snapshoting creation exception rasied and
         task is marked as failed
         """
 
+        mocker.patch(
+            "pulp_manager.app.services.snapshotter.Snapshotter._do_reconcile",
+            side_effect=Exception, autospec=True
+        )
+        mocker.patch(
+            "pulp_manager.app.services.snapshotter.Snapshotter._do_snapshot_repos", autospec=True
+        )
+
         with pytest.raises(Exception):
             self.snapshotter.snapshot_repos(snapshot_prefix="my-test", regex_include="^ext-")
@@ -1,10 +1,11 @@
 """Tests for the sync config parser
 """
 
+import copy
 import pytest
-import json
 import os
-from mock import patch, mock_open, MagicMock
+from unittest.mock import patch, mock_open, MagicMock
+from sqlalchemy import delete
 
 from pulp_manager.app.database import session, engine
 from pulp_manager.app.exceptions import PulpManagerPulpConfigError
@@ -16,205 +17,164 @@ from pulp_manager.app.services.sync_config_parser import (
     validate_schema, load_pulp_config, parse_config_file, PulpConfigParser
 )
 
-def test_validate_schema_pass():
-    """Tests that a valid schema doesn't generate any exceptions
-    """
 
-    config = {
-        "pulp_servers": {
-            "pulpmast1.example.com": {
-                "credentials": "example_creds",
-                "repo_groups": {
-                    "external_repos": {
-                        "schedule": "0 0 * * *",
-                        "max_concurrent_syncs": 2,
-                        "max_runtime": "2h"
-                    }
-                }
-            },
-            "core-rpm.example.com": {
-                "credentials": "example_creds",
-                "repo_groups": {
-                    "external_repos": {
-                        "schedule": "0 0 * * *",
-                        "max_concurrent_syncs": 2,
-                        "max_runtime": "2h"
-                    }
+# Valid config that tests take a copy of and alter for the case being tested
+BASE_CONFIG = {
+    "pulp_servers": {
+        "pulpmast1.example.com": {
+            "credentials": "example_creds",
+            "repo_groups": {
+                "external_repos": {
+                    "schedule": "0 0 * * *",
+                    "max_concurrent_syncs": 2,
+                    "max_runtime": "2h"
                 }
             }
         },
-        "credentials": {
-            "example_creds": {
-                "username": "test",
-                "vault_service_account_mount": "service-accounts"
-            }
-        },
-        "repo_groups": {
-            "external_repos": {
-                "regex_include": "^ext-"
+        "core-rpm.example.com": {
+            "credentials": "example_creds",
+            "repo_groups": {
+                "external_repos": {
+                    "schedule": "0 0 * * *",
+                    "max_concurrent_syncs": 2,
+                    "max_runtime": "2h"
+                }
             }
         }
+    },
+    "credentials": {
+        "example_creds": {
+            "username": "test",
+            "vault_service_account_mount": "service-accounts"
+        }
+    },
+    "repo_groups": {
+        "external_repos": {
+            "regex_include": "^ext-"
+        }
     }
-
-    validate_schema(config)
-
-
-def test_validate_schema_invalid_server():
-    """Tests what when invalid config is given for a pulp server an exception is raised
-    """
-
-    config = {
-        "pulp_servers": {
-            "pulpmast1.example.com": {
-                "repo_groups": {
-                    "external_repos": {
-                        "schedule": "0 0 * * *",
-                        "max_concurrent_syncs": 2,
-                    }
+}
+
+# Config loaded by the parser tests that update the db. The parser only reads config,
+# so tests share this rather than building their own copy
+PULP_SYNC_CONFIG = {
+    "pulp_servers": {
+        "pulpmast3.example.com": {
+            "credentials": "example",
+            "repo_groups": {
+                "repo_group_1": {
+                    "schedule": "0 0 * * *",
+                    "max_runtime": "3h",
+                    "max_concurrent_syncs": 2
+                },
+                "repo_group_2": {
+                    "schedule": "0 0 * * *",
+                    "max_runtime": "3h",
+                    "max_concurrent_syncs": 2
                 }
             }
         },
-        "credentials": {
-            "example_creds": {
-                "username": "test",
-                "vault_service_account_mount": "service-accounts"
+        "pulpslav2.example.com": {
+            "credentials": "example",
+            "repo_groups": {
+                "repo_group_2": {
+                    "schedule": "0 0 * * *",
+                    "max_runtime": "6h",
+                    "max_concurrent_syncs": 4
+                }
             }
+        }
+    },
+    "credentials": {
+        "example": {
+            "username": "username",
+            "vault_service_account_mount": "service-accounts"
+        }
+    },
+    "repo_groups": {
+        "repo_group_1": {
+            "regex_include": "rg1"
         },
-        "repo_groups": {
-            "external_repos": {
-                "regex_include": "^ext-"
-            }
+        "repo_group_2": {
+            "regex_exclude": "rg2"
         }
     }
+}
 
-    with pytest.raises(PulpManagerPulpConfigError):
-        validate_schema(config)
+# JSON is valid YAML, so a literal is enough for loading config without serialising a dict
+PULP_CONFIG_PAYLOAD = '{"key": "value"}'
 
 
-def test_validate_schema_invalid_credentials():
-    """Tests what when invalid config is given for a credential an exception is raised
+def test_validate_schema_pass():
+    """Tests that a valid schema doesn't generate any exceptions
     """
 
-    config = {
-        "pulp_servers": {
-            "pulpmast1.example.com": {
-                "credentials": "example_creds",
-                "repo_groups": {
-                    "external_repos": {
-                        "schedule": "0 0 * * *",
-                        "max_concurrent_syncs": 2,
-                        "max_runtime": "2h"
-                    }
-                }
-            }
-        },
-        "credentials": {
-            "example_creds": {
-                "username": "test",
-                "password": "password",
-            }
-        },
-        "repo_groups": {
-            "external_repos": {
-                "regex_include": "^ext-"
-            }
-        }
-    }
+    validate_schema(copy.deepcopy(BASE_CONFIG))
 
 
-    with pytest.raises(PulpManagerPulpConfigError):
-        validate_schema(config)
+def remove_server_credentials(config: dict):
+    """Removes the required credentials from a pulp server
+    """
+
+    del config["pulp_servers"]["pulpmast1.example.com"]["credentials"]
 
 
-def test_validate_schema_missing_credentials():
-    """Tests that when credential name is missing an exception is raised
+def set_password_credentials(config: dict):
+    """Replaces the vault service account mount of a credential with a password
     """
 
-    config = {
-        "pulp_servers": {
-            "pulpmast1.example.com": {
-                "credentials": "example_credzzz",
-                "repo_groups": {
-                    "external_repos": {
-                        "schedule": "0 0 * * *",
-                        "max_concurrent_syncs": 2,
-                        "max_runtime": "2h"
-                    }
-                }
-            }
-        },
-        "credentials": {
-            "example_creds": {
-                "username": "test",
-                "vault_service_account_mount": "service-accounts"
-            }
-        },
-        "repo_groups": {
-            "external_repos": {
-                "regex_include": "^ext-"
-            }
-        }
-    }
+    config["credentials"]["example_creds"] = {"username": "test", "password": "password"}
 
-    with pytest.raises(PulpManagerPulpConfigError):
-        validate_schema(config)
+
+def set_missing_credentials(config: dict):
+    """Points a pulp server at a credential name which doesn't exist
+    """
+
+    config["pulp_servers"]["pulpmast1.example.com"]["credentials"] = "example_credzzz"
 
 
-def test_validate_schema_missing_repo_group():
-    """Tests that when the repo group name is invalid an exception is raised
+def set_missing_repo_group(config: dict):
+    """Points a pulp server at a repo group name which doesn't exist
     """
 
-    config = {
-        "pulp_servers": {
-            "pulpmast1.example.com": {
-                "credentials": "example_creds",
-                "repo_groups": {
-                    "external_repozzzzzz": {
-                        "schedule": "0 0 * * *",
-                        "max_concurrent_syncs": 2,
-                        "max_runtime": "2h"
-                    }
-                }
-            }
-        },
-        "credentials": {
-            "example_creds": {
-                "username": "test",
-                "vault_service_account_mount": "service-accounts"
-            }
-        },
-        "repo_groups": {
-            "external_repos": {
-                "regex_include": "^ext-"
-            }
-        }
-    }
+    repo_groups = config["pulp_servers"]["pulpmast1.example.com"]["repo_groups"]
+    repo_groups["external_repozzzzzz"] = repo_groups.pop("external_repos")
+
+
+@pytest.mark.parametrize("mutate", [
+    remove_server_credentials,
+    set_password_credentials,
+    set_missing_credentials,
+    set_missing_repo_group
+], ids=["invalid_server", "invalid_credentials", "missing_credentials", "missing_repo_group"])
+def test_validate_schema_invalid(mutate):
+    """Tests that an exception is raised when the config is invalid for a pulp server,
+    credential or when a referenced credential or repo group is missing
+    """
+
+    config = copy.deepcopy(BASE_CONFIG)
+    mutate(config)
 
     with pytest.raises(PulpManagerPulpConfigError):
         validate_schema(config)
 
 
-@patch("os.path.isfile")
-def test_load_pulp_config(mock_isfile):
+def test_load_pulp_config(monkeypatch):
     """Tests that when a valid file yaml file is passed a dict is returned
     """
 
-    mock_isfile.return_value = True
-
-    def open_side_effect(name, mode=None):
-        return mock_open(read_data=json.dumps({"key": "value"}))()
+    monkeypatch.setattr("os.path.isfile", lambda path: True)
 
-    with patch("builtins.open", side_effect=open_side_effect):
+    with patch("builtins.open", mock_open(read_data=PULP_CONFIG_PAYLOAD)):
         result = load_pulp_config("test.yaml")
         assert isinstance(result, dict)
 
 
-@patch("os.path.isfile")
-def test_load_pulp_config_missing_file(mock_isfile):
+def test_load_pulp_config_missing_file(monkeypatch):
     """Tests that when a path passed isn't a file an excpetion is raised
     """
 
-    mock_isfile.return_value = False
+    monkeypatch.setattr("os.path.isfile", lambda path: False)
 
     with pytest.raises(PulpManagerPulpConfigError):
         result = load_pulp_config("invalid.yaml")
@@ -225,41 +185,7 @@ def test_parse_config_file(mock_load_pulp_config):
     """Tests that with a valid config file parse_config_file loads correctly
     """
 
-    mock_load_pulp_config.return_value = {
-        "pulp_servers": {
-            "pulpmast1.example.com": {
-                "credentials": "example_creds",
-                "repo_groups": {
-                    "external_repos": {
-                        "schedule": "0 0 * * *",
-                        "max_concurrent_syncs": 2,
-                        "max_runtime": "2h"
-                    }
-                }
-            },
-            "core-rpm.example.com": {
-                "credentials": "example_creds",
-                "repo_groups": {
-                    "external_repos": {
-                        "schedule": "0 0 * * *",
-                        "max_concurrent_syncs": 2,
-                        "max_runtime": "2h"
-                    }
-                }
-            }
-        },
-        "credentials": {
-            "example_creds": {
-                "username": "test",
-                "vault_service_account_mount": "service-accounts"
-            }
-        },
-        "repo_groups": {
-            "external_repos": {
-                "regex_include": "^ext-"
-            }
-        }
-    }
+    mock_load_pulp_config.return_value = copy.deepcopy(BASE_CONFIG)
 
     result = parse_config_file("test.yaml")
     assert isinstance(result, dict)
@@ -269,98 +195,140 @@ class TestPulpConfigParser:
     """Carried out tests in the pulp config parser
     """
 
-    def setup_method(self):
-        """Ensure an instance of PulpConfigParser is avaialble for all tests
+    @pytest.fixture(scope="class")
+    def seeded_connection(self, apply_migrations):
+        """Connection shared by all tests in the class. The sample data is replaced with the
+        pulp servers and repo groups these tests use, inside a transaction that is rolled
+        back once the class completes. Returns the connection and the ids of the seeded
+        entities
         """
 
-        # Clear db before each run, so that generated sample data for these tests
-        # is reset for each test, as these objects get manipulated each time
-        self.db = session()
-        pulp_server_repository = PulpServerRepository(self.db)
-        pulp_server_repo_group_repository = PulpServerRepoGroupRepository(self.db)
-        repo_group_repository = RepoGroupRepository(self.db)
-
-        for pulp_server in pulp_server_repository.filter():
-            pulp_server_repository.delete(pulp_server)
-
-        for repo_group in repo_group_repository.filter():
-            repo_group_repository.delete(repo_group)
-
-        self.db.commit()
-
+        connection = engine.connect()
+        transaction = connection.begin()
+
+        try:
+            db = session(bind=connection, join_transaction_mode="create_savepoint")
+            try:
+                pulp_server_repository = PulpServerRepository(db)
+                pulp_server_repo_group_repository = PulpServerRepoGroupRepository(db)
+                repo_group_repository = RepoGroupRepository(db)
+
+                # Clear out the sample data with a single DELETE per table. The pulp server
+                # repo groups go first as pulp_master_id doesn't cascade, everything else
+                # referencing pulp servers and repo groups is removed by ON DELETE CASCADE
+                db.execute(delete(PulpServerRepoGroup))
+                db.execute(delete(PulpServer))
+                db.execute(delete(RepoGroup))
+
+                # Seed rows are inserted with a single INSERT ... RETURNING per table
+                pulp_servers = {
+                    pulp_server.name: pulp_server
+                    for pulp_server in pulp_server_repository.bulk_add([
+                        {
+                            "name": "pulpmast3.example.com",
+                            "username": "username",
+                            "vault_service_account_mount": "service-accounts",
+                            "snapshot_supported": False,
+                            "max_concurrent_snapshots": None
+                        },
+                        {
+                            "name": "pulpslav1.example.com",
+                            "username": "username",
+                            "vault_service_account_mount": "service-accounts",
+                            "snapshot_supported": False,
+                            "max_concurrent_snapshots": None
+                        }
+                    ])
+                }
 
-        self.pulpmast3 = pulp_server_repository.add(**{
-            "name": "pulpmast3.example.com",
-            "username": "username",
-            "vault_service_account_mount": "service-accounts",
-            "snapshot_supported": False,
-            "max_concurrent_snapshots": None
-        })
+                repo_groups = {
+                    repo_group.name: repo_group
+                    for repo_group in repo_group_repository.bulk_add([
+                        {"name": "repo_group_1", "regex_include": "rg1"},
+                        {"name": "repo_group_2", "regex_exclude": "rg2"},
+                        {"name": "repo_group_3", "regex_exclude": "rg3"}
+                    ])
+                }
 
-        self.pulpslav1 = pulp_server_repository.add(**{
-            "name": "pulpslav1.example.com",
-            "username": "username",
-            "vault_service_account_mount": "service-accounts",
-            "snapshot_supported": False,
-            "max_concurrent_snapshots": None
-        })
+                seed_ids = {
+                    "pulpmast3": pulp_servers["pulpmast3.example.com"].id,
+                    "pulpslav1": pulp_servers["pulpslav1.example.com"].id,
+                    "repo_group1": repo_groups["repo_group_1"].id,
+                    "repo_group2": repo_groups["repo_group_2"].id,
+                    "repo_group3": repo_groups["repo_group_3"].id
+                }
 
-        self.repo_group1 = repo_group_repository.add(**{
-            "name": "repo_group_1",
-            "regex_include": "rg1"
-        })
+                pulp_server_repo_group_repository.bulk_add([
+                    {
+                        "pulp_server_id": seed_ids["pulpmast3"],
+                        "repo_group_id": seed_ids[repo_group],
+                        "schedule": "0 0 * * *",
+                        "max_runtime": "6h",
+                        "max_concurrent_syncs": 2
+                    }
+                    for repo_group in ("repo_group1", "repo_group3")
+                ])
+
+                db.commit()
+            finally:
+                db.close()
+
+            yield connection, seed_ids
+        finally:
+            transaction.rollback()
+            connection.close()
+
+    @pytest.fixture(autouse=True)
+    def setup_pulp_config_parser(self, seeded_connection):
+        """Ensure an instance of PulpConfigParser is avaialble for all tests. Each test runs
+        in a SAVEPOINT that is rolled back afterwards, so changes made to the seeded data
+        don't affect the next test
+        """
 
-        self.repo_group2 = repo_group_repository.add(**{
-            "name": "repo_group_2",
-            "regex_exclude": "rg2"
-        })
+        connection, seed_ids = seeded_connection
+        nested = connection.begin_nested()
+        self.db = session(bind=connection, join_transaction_mode="create_savepoint")
+
+        self.pulpmast3 = self.db.get(PulpServer, seed_ids["pulpmast3"])
+        self.pulpslav1 = self.db.get(PulpServer, seed_ids["pulpslav1"])
+        self.repo_group1 = self.db.get(RepoGroup, seed_ids["repo_group1"])
+        self.repo_group2 = self.db.get(RepoGroup, seed_ids["repo_group2"])
+        self.repo_group3 = self.db.get(RepoGroup, seed_ids["repo_group3"])
+        self.pulpmast3_repo_group3 = self.db.get(
+            PulpServerRepoGroup, (seed_ids["pulpmast3"], seed_ids["repo_group3"])
+        )
+        self.pulp_config_parser = PulpConfigParser(self.db)
 
-        self.repo_group3 = repo_group_repository.add(**{
-            "name": "repo_group_3",
-            "regex_exclude": "rg3"
-        })
+        yield
 
-        self.pulpmast3_repo_group1 = pulp_server_repo_group_repository.add(**{
-            "pulp_server": self.pulpmast3,
-            "repo_group": self.repo_group1,
-            "schedule": "0 0 * * *",
-            "max_runtime": "6h",
-            "max_concurrent_syncs": 2
-        })
+        self.db.close()
+        nested.rollback()
 
-        self.pulpmast3_repo_group3 = pulp_server_repo_group_repository.add(**{
-            "pulp_server": self.pulpmast3,
-            "repo_group": self.repo_group3,
-            "schedule": "0 0 * * *",
-            "max_runtime": "6h",
-            "max_concurrent_syncs": 2
-        })
+    @pytest.fixture
+    def existing_pulp_servers(self):
+        """Existing pulp servers, loaded once for tests that only read them
+        """
 
-        self.db.commit()
-        self.pulp_config_parser = PulpConfigParser(self.db)
+        return self.pulp_config_parser._get_existing_pulp_servers()
 
-    def teardown_method(self):
-        """Ensure db connections are closed
+    @pytest.fixture
+    def existing_repo_groups(self):
+        """Existing repo groups, loaded once for tests that only read them
         """
 
-        self.db.close()
-        engine.dispose()
+        return self.pulp_config_parser._get_existing_repo_groups()
 
     def test_get_existing_repo_groups(self):
-        """Tests that a dict is returned where the key is the repo group name
-        and the value is the matching repo group object
+        """Tests that repo groups are returned keyed by repo group name and by id,
+        with both lookups pointing to the matching repo group object
         """
 
         result = self.pulp_config_parser._get_existing_repo_groups()
 
-        # _get_existing_repo_groups returns a dict where there are two keys pointing to the
-        # same value. the first key is the name of the repo group and the second key is the ID
-        # of the repo group
-        for key in result:
-            if isinstance(key, str):
-                assert isinstance(result[key], RepoGroup)
-                repo_group_id = result[key].id
-                assert result[repo_group_id].name == key
+        assert len(result.by_name) == len(result.by_id)
+        for name, repo_group in result.by_name.items():
+            assert isinstance(repo_group, RepoGroup)
+            assert result.by_id[repo_group.id].name == name
 
     def test_calculate_repo_groups_to_add(self):
         """Tests that a list of dicts of repo groups to add is returned which contains
@@ -390,16 +358,16 @@ class TestPulpConfigParser:
             fake_existing_repo_groups, fake_configured_repo_groups
         )
 
-        # looping over a list of dicts, as the _calculate_repo_groups_to_add method
+        # result is a list of dicts, as the _calculate_repo_groups_to_add method
         # generates a dict to carry out a bulk add of repo groups
-        for repo_group_to_add in result:
-            name = repo_group_to_add["name"]
-            assert name  not in fake_existing_repo_groups
+        assert {repo_group_to_add["name"] for repo_group_to_add in result} == (
+            set(fake_configured_repo_groups) - set(fake_existing_repo_groups)
+        )
 
-            # check correct regex include/exclude values have been copied
-            for configured_prop_key, configured_prop_value in fake_configured_repo_groups[name].items():
-                assert configured_prop_key in repo_group_to_add
-                assert repo_group_to_add[configured_prop_key] == configured_prop_value
+        # check correct regex include/exclude values have been copied
+        for repo_group_to_add in result:
+            configured = fake_configured_repo_groups[repo_group_to_add["name"]]
+            assert configured.items() <= repo_group_to_add.items()
 
     def test_calculate_repo_groups_to_remove(self):
         """Tests that a list of entities is returned for the repo groups to be removed. Checks
@@ -479,12 +447,10 @@ class TestPulpConfigParser:
         }
 
         result = self.pulp_config_parser._process_repo_groups(fake_configured_repo_groups)
-        # Expect 6 items in the list because the fact the dict contains two refferences
-        # to the repo groups. One via the repo group name and the other via the repo group ID
-        assert len(result.keys()) == 6
-        for repo_group_name in result.keys():
-            if isinstance(repo_group_name, str):
-                assert repo_group_name in fake_configured_repo_groups
+        assert len(result.by_name) == 3
+        assert len(result.by_id) == 3
+        for repo_group_name in result.by_name:
+            assert repo_group_name in fake_configured_repo_groups
 
     def test_get_existing_pulp_servers(self):
         """Tests that a dict of pulp servers is returned where the key is the name
@@ -524,9 +490,6 @@ class TestPulpConfigParser:
             }
         }
 
-        # Use the pulp_config_parser that contains a mock db and repo group info
-        # to load the exisitng repo groups in the correct format
-        fake_repo_groups_db = self.pulp_config_parser._get_existing_repo_groups()
         self.pulp_config_parser._add_pulp_servers(fake_config)
 
         existing_pulp_servers = self.pulp_config_parser._get_existing_pulp_servers()
@@ -588,17 +551,20 @@ class TestPulpConfigParser:
         """
 
         pulp_servers_to_remove = [self.pulpslav1]
+        # Read before the delete, as the entity is expired if the removal commits
+        removed_pulp_server_id = self.pulpslav1.id
 
-        pulp_server_count_before_delete = len(self.pulp_config_parser._get_existing_pulp_servers())
+        pulp_server_count_before_delete = self.pulp_config_parser.pulp_server_crud.count()
 
         self.pulp_config_parser._remove_pulp_servers(pulp_servers_to_remove)
         pulp_servers = self.pulp_config_parser._get_existing_pulp_servers()
         assert len(pulp_servers) + 1 == pulp_server_count_before_delete
 
         for pulp_server_name in pulp_servers:
-            assert pulp_servers[pulp_server_name].id != 2
+            assert pulp_servers[pulp_server_name].id != removed_pulp_server_id
 
-    def test_calculate_pulp_server_repo_groups_to_add(self):
+    def test_calculate_pulp_server_repo_groups_to_add(self, existing_pulp_servers,
+            existing_repo_groups):
         """Tests that a list is returned that contains config only for repo groups that
         need to be added to the pulp server
         """
@@ -619,8 +585,6 @@ class TestPulpConfigParser:
             }
         }
 
-        existing_pulp_servers = self.pulp_config_parser._get_existing_pulp_servers()
-        existing_repo_groups = self.pulp_config_parser._get_existing_repo_groups()
         repo_groups_to_add = self.pulp_config_parser._calculate_pulp_server_repo_groups_to_add(
             existing_pulp_servers["pulpslav1.example.com"],
             existing_repo_groups,
@@ -636,7 +600,8 @@ class TestPulpConfigParser:
         assert repo_groups_to_add[0]["max_concurrent_syncs"] == 2
         assert repo_groups_to_add[0]["pulp_master_id"] == self.pulpmast3.id
 
-    def test_calculate_pulp_server_repo_groups_to_update(self):
+    def test_calculate_pulp_server_repo_groups_to_update(self, existing_pulp_servers,
+            existing_repo_groups):
         """Checks that a list is returned that contains on the fields that need to be updated for
         the given pulp server repo groups
         """
@@ -663,8 +628,6 @@ class TestPulpConfigParser:
             }
         }
 
-        existing_pulp_servers = self.pulp_config_parser._get_existing_pulp_servers()
-        existing_repo_groups = self.pulp_config_parser._get_existing_repo_groups()
         repo_groups_to_update = self.pulp_config_parser._calculate_pulp_server_repo_groups_to_update(
             existing_pulp_servers["pulpmast3.example.com"],
             existing_repo_groups,
@@ -680,7 +643,8 @@ class TestPulpConfigParser:
         assert "schedule" not in repo_groups_to_update[0]
         assert "max_concurrent_syncs" not in repo_groups_to_update[0]
 
-    def test_calculate_pulp_server_repo_groups_to_remove(self):
+    def test_calculate_pulp_server_repo_groups_to_remove(self, existing_pulp_servers,
+            existing_repo_groups):
         """Checks that the correct PulpServerRepoGroup entites are returned to be removed
         from the database
         """
@@ -700,9 +664,6 @@ class TestPulpConfigParser:
             }
         }
 
-        existing_pulp_servers = self.pulp_config_parser._get_existing_pulp_servers()
-        existing_repo_groups = self.pulp_config_parser._get_existing_repo_groups()
-
         repo_groups_to_remove = self.pulp_config_parser._calculate_pulp_server_repo_groups_to_remove(
             existing_pulp_servers["pulpmast3.example.com"],
             existing_repo_groups,
@@ -712,7 +673,7 @@ class TestPulpConfigParser:
         assert len(repo_groups_to_remove) == 1
         assert repo_groups_to_remove[0].repo_group_id == self.repo_group3.id
 
-    def test_calculate_pulp_server_updates(self):
+    def test_calculate_pulp_server_updates(self, existing_pulp_servers, existing_repo_groups):
         """Checks that only pulp servers, which required an update have config returned
         """
 
@@ -746,12 +707,7 @@ class TestPulpConfigParser:
             }
         }
 
-        existing_pulp_servers = self.pulp_config_parser._get_existing_pulp_servers()
-        existing_repo_groups = self.pulp_config_parser._get_existing_repo_groups()
-
-        pulp_servers = []
-        for key, value in existing_pulp_servers.items():
-            pulp_servers.append(value)
+        pulp_servers = list(existing_pulp_servers.values())
 
         pulp_servers_to_update = self.pulp_config_parser._calculate_pulp_server_updates(
             pulp_servers, existing_repo_groups, fake_config, existing_pulp_servers
@@ -761,11 +717,13 @@ class TestPulpConfigParser:
         assert pulp_servers_to_update[0]["pulp_server"].name == "pulpmast3.example.com"
         assert len(pulp_servers_to_update[0]["pulp_server_config"]) == 0
         assert len(pulp_servers_to_update[0]["repo_groups_to_add"]) == 1
-        assert pulp_servers_to_update[0]["repo_groups_to_add"][0]["repo_group_id"] not in [1, 3]
+        assert pulp_servers_to_update[0]["repo_groups_to_add"][0]["repo_group_id"] not in [
+            self.repo_group1.id, self.repo_group3.id
+        ]
         assert len(pulp_servers_to_update[0]["repo_groups_to_update"]) == 1
         assert len(pulp_servers_to_update[0]["repo_groups_to_remove"]) == 1
 
-    def test_calculate_pulp_servers_to_remove(self):
+    def test_calculate_pulp_servers_to_remove(self, existing_pulp_servers):
         """Tests that from a list of pulp servers and loaded config, the correct
         Pulp Server entities are returned to be removed from the DB
         """
@@ -776,12 +734,7 @@ class TestPulpConfigParser:
             }
         }
 
-        pulp_servers = []
-        existing_pulp_servers = self.pulp_config_parser._get_existing_pulp_servers()
-        existing_repo_groups = self.pulp_config_parser._get_existing_repo_groups()
-
-        for key, value in existing_pulp_servers.items():
-            pulp_servers.append(value)
+        pulp_servers = list(existing_pulp_servers.values())
 
         pulp_servers_to_remove = self.pulp_config_parser._calculate_pulp_servers_to_remove(
             pulp_servers, fake_config
@@ -794,52 +747,8 @@ class TestPulpConfigParser:
         """Tests expected updates are made to the pulp server config in the DB
         """
 
-        fake_config = {
-            "pulp_servers": {
-                "pulpmast3.example.com": {
-                    "credentials": "example",
-                    "repo_groups": {
-                        "repo_group_1": {
-                            "schedule": "0 0 * * *",
-                            "max_runtime": "3h",
-                            "max_concurrent_syncs": 2
-                        },
-                        "repo_group_2": {
-                            "schedule": "0 0 * * *",
-                            "max_runtime": "3h",
-                            "max_concurrent_syncs": 2
-                        }
-                    }
-                },
-                "pulpslav2.example.com": {
-                    "credentials": "example",
-                    "repo_groups": {
-                        "repo_group_2": {
-                            "schedule": "0 0 * * *",
-                            "max_runtime": "6h",
-                            "max_concurrent_syncs": 4
-                        }
-                    }
-                }
-            },
-            "credentials": {
-                "example": {
-                    "username": "username",
-                    "vault_service_account_mount": "service-accounts"
-                }
-            },
-            "repo_groups": {
-                "repo_group_1": {
-                    "regex_include": "rg1"
-                },
-                "repo_group_2": {
-                    "regex_exclude": "rg2"
-                }
-            }
-        }
-
         existing_repo_groups = self.pulp_config_parser._get_existing_repo_groups()
-        self.pulp_config_parser._process_pulp_servers(fake_config, existing_repo_groups)
+        self.pulp_config_parser._process_pulp_servers(PULP_SYNC_CONFIG, existing_repo_groups)
 
 
         pulp_servers = self.pulp_config_parser._get_existing_pulp_servers()
@@ -854,51 +763,8 @@ class TestPulpConfigParser:
         """Tests db is updated correctly based on differences from config that is loaded
         """
 
-        mock_parse_config_file.return_value = {
-            "pulp_servers": {
-                "pulpmast3.example.com": {
-                    "credentials": "example",
-                    "repo_groups": {
-                        "repo_group_1": {
-                            "schedule": "0 0 * * *",
-                            "max_runtime": "3h",
-                            "max_concurrent_syncs": 2
-                        },
-                        "repo_group_2": {
-                            "schedule": "0 0 * * *",
-                            "max_runtime": "3h",
-                            "max_concurrent_syncs": 2
-                        }
-                    }
-                },
-                "pulpslav2.example.com": {
-                    "credentials": "example",
-                    "repo_groups": {
-                        "repo_group_2": {
-                            "schedule": "0 0 * * *",
-                            "max_runtime": "6h",
-                            "max_concurrent_syncs": 4
-                        }
-                    }
-                }
-            },
-            "credentials": {
-                "example": {
-                    "username": "username",
-                    "vault_service_account_mount": "service-accounts"
-                }
-            },
-            "repo_groups": {
-                "repo_group_1": {
-                    "regex_include": "rg1"
-                },
-                "repo_group_2": {
-                    "regex_exclude": "rg2"
-                }
-            }
-        }
+        mock_parse_config_file.return_value = PULP_SYNC_CONFIG
 
-        existing_repo_groups = self.pulp_config_parser._get_existing_repo_groups()
         self.pulp_config_parser.load_config("fake_file.yml")
 
 
@@ -908,6 +774,6 @@ class TestPulpConfigParser:
         assert len(pulp_servers) == 2
         assert "pulpmast3.example.com" in pulp_servers
         assert "pulpslav2.example.com" in pulp_servers
-        assert len(repo_groups) == 4 # Due to two differnt keys pointing to same entity by id and name
-        assert "repo_group_1" in repo_groups
-        assert "repo_group_2" in repo_groups
+        assert len(repo_groups.by_name) == 2
+        assert "repo_group_1" in repo_groups.by_name
+        assert "repo_group_2" in repo_groups.by_name
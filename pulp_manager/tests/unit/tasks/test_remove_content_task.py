@@ -1,199 +1,134 @@
 """Runs tests on the remove content task
 """
 
+from contextlib import nullcontext
 from datetime import datetime
 import pytest
-from mock import patch
+from unittest.mock import patch, DEFAULT
 
 from pulp3_bindings.pulp3 import Pulp3Client
 from pulp3_bindings.pulp3.resources import RpmRepository, RpmRemote, Task as PulpTask
 
-from pulp_manager.app.database import session, engine
+from pulp_manager.app.database import session
 from pulp_manager.app.exceptions import PulpManagerPulpTaskError
 from pulp_manager.app.models import PulpServer, Repo, PulpServerRepo, Task
 from pulp_manager.app.tasks.remove_content_task import remove_repo_content
 from pulp_manager.app.repositories import (TaskRepository)
 
-class TestRemoveContentTask:
-    """Tests for removing content from a repo
-    """
-
-
-    @patch("pulp_manager.app.tasks.remove_content_task.new_pulp_client")
-    @patch("pulp_manager.app.tasks.remove_content_task.get_remote")
-    @patch("pulp_manager.app.tasks.remove_content_task.get_repo")
-    @patch("pulp_manager.app.tasks.remove_content_task.modify_repo")
-    @patch("pulp_manager.app.tasks.remove_content_task.get_task")
-    @patch("pulp_manager.app.tasks.remove_content_task.PulpManager", autospec=True)
-    @patch("pulp_manager.app.tasks.remove_content_task.sleep")
-    def test_remove_repo_content_ok(self, mock_sleep, mock_pulp_manager, mock_get_task,
-            mock_modify_repo, mock_get_repo, mock_get_remote, mock_new_pulp_client):
-        """When there are no errors at any stages the remove repo content task should complete succesffully
-        """
-
-        def new_pulp_client(pulp_server: PulpServer):
-            return Pulp3Client(pulp_server.name, username=pulp_server.username, password="test")
-
-
-        def get_task(client: Pulp3Client, href: str):
-            return PulpTask(**{
-                "pulp_href": href,
-                "pulp_created": datetime.utcnow(),
-                "state": "completed",
-                "name": "task",
-                "logging_cid": "log123",
-                "created_resources": ["/pulp/api/v3/repositories/rpm/rpm/123/versions/5"] if "123" in href else []
-            })
 
-        mock_new_pulp_client.side_effect = new_pulp_client
-        mock_get_task.side_effect = get_task
+FIXED_DT = datetime(2024, 1, 1)
+# Pulp responses are only read by the task, so are built once and shared between tests
+RPM_REMOTE = RpmRemote(**{
+    "pulp_href": "/pulp/api/v3/remotes/rpm/rpm/123",
+    "name": "test-remote",
+    "url": "https://rpm.remote.local/",
+    "policy": "immediate"
+})
+RPM_REPO = RpmRepository(**{
+    "pulp_href": "/pulp/api/v3/repositories/rpm/rpm/123",
+    "name": "test-remote",
+    "remote": "/pulp/api/v3/remotes/rpm/rpm/123",
+    "latest_version_href": "/pulp/api/v3/repositories/rpm/rpm/123/versions/1"
+})
+RUNNING_MODIFY_TASK = PulpTask(**{
+    "pulp_href": "/pulp/api/v3/tasks/123",
+    "pulp_created": FIXED_DT,
+    "state": "running",
+    "name": "task",
+    "logging_cid": "log123"
+})
+RUNNING_PUBLISH_TASK = RUNNING_MODIFY_TASK.copy(update={"pulp_href": "/pulp/api/v3/tasks/456"})
+
+
+def new_pulp_client(pulp_server: PulpServer):
+    """Side effect for new_pulp_client returning a client for the pulp server
+    """
 
-        mock_get_remote.return_value = RpmRemote(**{
-            "pulp_href": "/pulp/api/v3/remotes/rpm/rpm/123",
-            "name": "test-remote",
-            "url": "https://rpm.remote.local/",
-            "policy": "immediate"
-        })
-        mock_get_repo.return_value = RpmRepository(**{
-            "pulp_href": "/pulp/api/v3/repositories/rpm/rpm/123",
-            "name": "test-remote",
-            "remote": "/pulp/api/v3/remotes/rpm/rpm/123",
-            "latest_version_href": "/pulp/api/v3/repositories/rpm/rpm/123/versions/1"
-        })
+    return Pulp3Client(pulp_server.name, username=pulp_server.username, password="test")
 
-        mock_modify_repo.return_value = PulpTask(**{
-            "pulp_href": "/pulp/api/v3/tasks/123",
-            "pulp_created": datetime.utcnow(),
-            "state": "running",
-            "name": "task",
-            "logging_cid": "log123"
-        })
- 
-        mock_pulp_manager.return_value.create_publication_from_repo_version.return_value = PulpTask(**{
-            "pulp_href": "/pulp/api/v3/tasks/456",
-            "pulp_created": datetime.utcnow(),
-            "state": "running",
-            "name": "task",
-            "logging_cid": "log123"
-        })
 
-        db = session()
+class TestRemoveContentTask:
+    """Tests for removing content from a repo
+    """
 
-        task = TaskRepository(db).add(**{
-            "name": "dummy task remove content ok",
-            "task_type_id": 1,
-            "state_id": 1,
-            "task_args": {"arg": "val"}
-        })
-        db.commit()
+    @pytest.fixture(autouse=True)
+    def setup_db(self, class_connection, mocker):
+        """Gives each test a session on the class connection, inside a SAVEPOINT that is
+        rolled back afterwards. remove_repo_content is given the same session, so what
+        it commits is visible to the test without being persisted
+        """
 
-        remove_repo_content(
-            "pulpserver1.domain.local", "repo1", "/pulp/api/v3/packages/rpm/content/123",
-            task.id, False
+        nested = class_connection.begin_nested()
+        self.db = session(bind=class_connection, join_transaction_mode="create_savepoint")
+        mocker.patch(
+            "pulp_manager.app.tasks.remove_content_task.session", return_value=self.db
         )
 
-        db.close()
-        engine.dispose()
-
-    @patch("pulp_manager.app.tasks.remove_content_task.new_pulp_client")
-    @patch("pulp_manager.app.tasks.remove_content_task.get_remote")
-    @patch("pulp_manager.app.tasks.remove_content_task.get_repo")
-    @patch("pulp_manager.app.tasks.remove_content_task.modify_repo")
-    @patch("pulp_manager.app.tasks.remove_content_task.get_task")
+        yield
+
+        self.db.close()
+        nested.rollback()
+
+    @pytest.mark.parametrize("task_state,get_repo_error,expected_exception,expected_state", [
+        ("completed", None, None, "completed"),
+        ("failed", None, PulpManagerPulpTaskError, "failed"),
+        ("completed", Exception("unexpected error"), Exception, "failed")
+    ], ids=["ok", "pulp_task_fail", "unexpected_fail"])
+    @patch.multiple(
+        "pulp_manager.app.tasks.remove_content_task", new_pulp_client=DEFAULT,
+        get_remote=DEFAULT, get_repo=DEFAULT, modify_repo=DEFAULT, get_task=DEFAULT,
+        sleep=DEFAULT
+    )
     @patch("pulp_manager.app.tasks.remove_content_task.PulpManager", autospec=True)
-    @patch("pulp_manager.app.tasks.remove_content_task.sleep")
-    def test_remove_repo_content_pulp_task_fail(self, mock_sleep, mock_pulp_manager, mock_get_task,
-            mock_modify_repo, mock_get_repo, mock_get_remote, mock_new_pulp_client):
-        """Tests that if a pulp task failes PulpManagerPulpTaskError is raised
+    def test_remove_repo_content(self, mock_pulp_manager, task_state, get_repo_error,
+            expected_exception, expected_state, **mocks):
+        """Tests the remove repo content task completes successfully when there are no errors
+        at any stage, that PulpManagerPulpTaskError is raised when a pulp task fails and
+        that an unexpected error is raised when get_repo fails. The task is marked with
+        the expected state in each case
         """
 
-        def new_pulp_client(pulp_server: PulpServer):
-            return Pulp3Client(pulp_server.name, username=pulp_server.username, password="test")
-
-
         def get_task(client: Pulp3Client, href: str):
             return PulpTask(**{
                 "pulp_href": href,
-                "pulp_created": datetime.utcnow(),
-                "state": "failed",
+                "pulp_created": FIXED_DT,
+                "state": task_state,
                 "name": "task",
                 "logging_cid": "log123",
-                "created_resources": []
+                "created_resources": ["/pulp/api/v3/repositories/rpm/rpm/123/versions/5"] if "123" in href else []
             })
 
-        mock_new_pulp_client.side_effect = new_pulp_client
-        mock_get_task.side_effect = get_task
-
-        mock_get_remote.return_value = RpmRemote(**{
-            "pulp_href": "/pulp/api/v3/remotes/rpm/rpm/123",
-            "name": "test-remote",
-            "url": "https://rpm.remote.local/",
-            "policy": "immediate"
-        })
-        mock_get_repo.return_value = RpmRepository(**{
-            "pulp_href": "/pulp/api/v3/repositories/rpm/rpm/123",
-            "name": "test-remote",
-            "remote": "/pulp/api/v3/remotes/rpm/rpm/123",
-            "latest_version_href": "/pulp/api/v3/repositories/rpm/rpm/123/versions/1"
-        })
-
-        mock_modify_repo.return_value = PulpTask(**{
-            "pulp_href": "/pulp/api/v3/tasks/123",
-            "pulp_created": datetime.utcnow(),
-            "state": "running",
-            "name": "task",
-            "logging_cid": "log123"
-        })
-
-
-        db = session()
-
-        task = TaskRepository(db).add(**{
-            "name": "dummy task remove content pulp task fail",
-            "task_type_id": 1,
-            "state_id": 1,
-            "task_args": {"arg": "val"}
-        })
-        db.commit()
-
-        with pytest.raises(PulpManagerPulpTaskError):
-            remove_repo_content(
-                "pulpserver1.domain.local", "repo1", "/pulp/api/v3/packages/rpm/content/123",
-                task.id, False
-            )
-
-        db.close()
-        engine.dispose()
-
-    @patch("pulp_manager.app.tasks.remove_content_task.new_pulp_client")
-    @patch("pulp_manager.app.tasks.remove_content_task.get_repo")
-    @patch("pulp_manager.app.tasks.remove_content_task.sleep")
-    def test_remove_repo_content_unexpected_fail(self, mock_sleep,
-            mock_get_repo, mock_new_pulp_client):
-        """Tests that if a unexpected error occurs excpetion is raised
-        """
-
-        def new_pulp_client(pulp_server: PulpServer):
-            return Pulp3Client(pulp_server.name, username=pulp_server.username, password="test")
-
-        mock_new_pulp_client.side_effect = new_pulp_client
-        mock_get_repo.side_effect = Exception("unexpected error")
+        mocks["new_pulp_client"].side_effect = new_pulp_client
+        mocks["get_task"].side_effect = get_task
 
-        db = session()
+        mocks["get_remote"].return_value = RPM_REMOTE
+        mocks["get_repo"].return_value = RPM_REPO
+        mocks["get_repo"].side_effect = get_repo_error
+        mocks["modify_repo"].return_value = RUNNING_MODIFY_TASK
+        pulp_manager = mock_pulp_manager.return_value
+        pulp_manager.create_publication_from_repo_version.return_value = RUNNING_PUBLISH_TASK
 
-        task = TaskRepository(db).add(**{
-            "name": "dummy task remove content pulp task fail",
+        task = TaskRepository(self.db).add(**{
+            "name": f"dummy task remove content {task_state}",
             "task_type_id": 1,
             "state_id": 1,
             "task_args": {"arg": "val"}
         })
-        db.commit()
+        self.db.commit()
+        task_id = task.id
 
-        with pytest.raises(Exception):
+        with pytest.raises(expected_exception) if expected_exception else nullcontext():
             remove_repo_content(
                 "pulpserver1.domain.local", "repo1", "/pulp/api/v3/packages/rpm/content/123",
-                2, False
+                task_id, False
             )
 
-        db.close()
-        engine.dispose()
+        assert self.db.get(Task, task_id).state == expected_state
+        if expected_exception is None:
+            mocks["modify_repo"].assert_called_once()
+            assert mocks["modify_repo"].call_args.kwargs["remove_content_units"] == [
+                "/pulp/api/v3/packages/rpm/content/123"
+            ]
+            pulp_manager.create_publication_from_repo_version.assert_called_once()
+            assert pulp_manager.create_publication_from_repo_version.call_args.args[0] == \
+                "/pulp/api/v3/repositories/rpm/rpm/123/versions/5"
@@ -3,12 +3,12 @@
 
 import pytest
 import fakeredis
-from mock import patch, MagicMock, Mock
+from unittest.mock import patch, MagicMock, Mock
 from rq import Queue
 from rq.job import Job
 from rq_scheduler import Scheduler
 
-from pulp_manager.app.database import session, engine
+from pulp_manager.app.database import session
 from pulp_manager.app.exceptions import (
     PulpManagerEntityNotFoundError, PulpManagerTaskInvalidStateError
 )
@@ -40,7 +40,6 @@ class TestJobManager:
         """
 
         self.db.close()
-        engine.dispose()
 
     def test_setup_pulp_server_repo_group_scheduled_jobs(self):
         """Tests that the correct jobs get added to the schedulers queue
@@ -2,16 +2,24 @@
 data stored in the DB
 """
 
+import pytest
 from pulp_manager.app.prometheus_pulp_manager_data import PulpManagerCollector
 
 
+@pytest.fixture(scope="module")
+def collector():
+    """Collector shared by the tests in the module, as creating one sets up a docker client
+    """
+
+    return PulpManagerCollector()
+
+
 class TestPulpManagerCollector:
     """Tests the pulp manager collector
     """
 
-    def test_collector(self):
+    def test_collector(self, collector):
         """Tests the collector runs successfully
         """
 
-        collector = PulpManagerCollector()
         collector.collect()